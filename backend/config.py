@@ -4,6 +4,7 @@ All constants, environment variables, and configuration loading logic
 lives here for easy auditing and modification.
 """
 
+import functools
 import os
 from pathlib import Path
 
@@ -21,6 +22,13 @@ DEFAULT_FAST_TEXT_MODEL = (
 # =============================================================================
 GEMINI_TIMEOUT_MS = int(os.environ.get("GEMINI_TIMEOUT_MS", "300000"))  # 200 seconds
 
+# =============================================================================
+# Concurrency
+# =============================================================================
+# Max in-flight Gemini requests per service. Batch endpoints fan out with
+# asyncio.gather; this keeps large batches from tripping API rate limits.
+GEMINI_MAX_CONCURRENCY = int(os.environ.get("GEMINI_MAX_CONCURRENCY", "10"))
+
 # =============================================================================
 # Feature Flags
 # =============================================================================
@@ -39,9 +47,14 @@ METADATA_FILE = BACKEND_DIR.parent / "metadata.json"
 # =============================================================================
 # API Key Loading
 # =============================================================================
+@functools.cache
 def get_gemini_api_key() -> str:
     """Load Gemini API key from environment or file.
 
+    The result is cached for the life of the process, so services constructed
+    after startup don't repeat the environment and file lookups. A missing key
+    raises every time and is not cached.
+
     Priority:
     1. GEMINI_API_KEY environment variable (direct key)
     2. GEMINI_API_KEY_PATH environment variable (path to file)
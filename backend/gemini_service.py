@@ -1,16 +1,21 @@
 """Gemini API service for image generation - simplified from Reverie."""
 
-import base64
+import asyncio
+import contextlib
+import functools
+import hashlib
 import json
 import logging
 import os
+import threading
 import time
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from typing import Any, Literal, TypeVar
+from typing import Annotated, Any, Literal, TypeVar
 
 from google import genai
 from google.genai import types
-from pydantic import BaseModel, Field
+from pydantic import AfterValidator, BaseModel, Field
 
 # Configure module logger
 logger = logging.getLogger(__name__)
@@ -20,13 +25,31 @@ T = TypeVar("T", bound=BaseModel)
 # ============================================================
 # Pydantic Models for Structured Output
 # ============================================================
+# Bounded list fields reach Gemini as maxItems to cap runaway lists in the
+# generated output. Bounds leave slack over the counts the prompts ask for.
+# Where a response is validated into these models, an over-long list is
+# trimmed rather than rejected, so one verbose field can't fail the whole
+# response. Variations skip validation and are trimmed to the same limits by
+# _unpack_variations (scenes) and server._scene_to_variation (per scene).
+_MAX_TAGS = 5
+_MAX_DIMENSIONS = 6
+_MAX_SCENES = 10
+
+def _bounded_list(item_type: type, limit: int) -> Any:
+    """List type advertised to Gemini with maxItems=limit, trimmed on validation."""
+    return Annotated[
+        list[item_type],
+        AfterValidator(lambda items: items[:limit]),
+        Field(json_schema_extra={"maxItems": limit}),
+    ]
+
 
 class DesignTags(BaseModel):
     """Design attributes for a scene variation."""
-    colors: list[str] = Field(default_factory=list, description="Color palette tags like 'warm', 'vibrant', 'high-contrast'")
-    composition: list[str] = Field(default_factory=list, description="Composition tags like 'centered', 'rule-of-thirds', 'wide-angle'")
-    layout: list[str] = Field(default_factory=list, description="Layout tags like 'spacious', 'dense', 'balanced'")
-    aesthetic: list[str] = Field(default_factory=list, description="Style tags like 'minimalist', 'photorealistic', 'illustrated'")
+    colors: _bounded_list(str, _MAX_TAGS) = Field(default_factory=list, description="Color palette tags like 'warm', 'vibrant', 'high-contrast'")
+    composition: _bounded_list(str, _MAX_TAGS) = Field(default_factory=list, description="Composition tags like 'centered', 'rule-of-thirds', 'wide-angle'")
+    layout: _bounded_list(str, _MAX_TAGS) = Field(default_factory=list, description="Layout tags like 'spacious', 'dense', 'balanced'")
+    aesthetic: _bounded_list(str, _MAX_TAGS) = Field(default_factory=list, description="Style tags like 'minimalist', 'photorealistic', 'illustrated'")
 
 
 class DesignDimensionOutput(BaseModel):
@@ -34,7 +57,7 @@ class DesignDimensionOutput(BaseModel):
     axis: str = Field(description="Design axis category like 'lighting', 'mood', 'colors'")
     name: str = Field(description="Evocative 2-4 word name like 'Eerie Green Cast'")
     description: str = Field(description="2-3 sentence analysis of how this dimension manifests")
-    tags: list[str] = Field(description="2-3 design vocabulary tags")
+    tags: _bounded_list(str, _MAX_TAGS) = Field(description="2-3 design vocabulary tags")
     generation_prompt: str = Field(description="Prompt for generating pure concept image")
 
 
@@ -48,7 +71,7 @@ class SceneVariation(BaseModel):
     type: str = Field(default="", description="Deprecated")
     mood: str = Field(default="", description="Deprecated")
     # Design dimensions - rich, substantial descriptions for design tokens
-    design_dimensions: list[DesignDimensionOutput] = Field(
+    design_dimensions: _bounded_list(DesignDimensionOutput, _MAX_DIMENSIONS) = Field(
         default_factory=list,
         description="3-4 substantial design dimensions capturing the visual essence"
     )
@@ -74,33 +97,119 @@ class AnnotationSuggestion(BaseModel):
 class SceneVariationsResponse(BaseModel):
     """Response containing multiple scene variations with context assignments."""
     title: str = Field(description="A short, creative title for this generation (2-5 words)")
-    scenes: list[SceneVariation] = Field(description="List of scene variations")
+    scenes: _bounded_list(SceneVariation, _MAX_SCENES) = Field(description="List of scene variations")
     annotation_suggestions: list[AnnotationSuggestion] | None = Field(
         default=None,
         description="Suggested annotation polish for context images with inadequate descriptions"
     )
 
 
+class ImageAnalysisResponse(BaseModel):
+    """Design analysis of a single image (for structured output)."""
+    annotation: str = Field(description="1-2 sentence annotation of what makes this image visually distinctive")
+    design_dimensions: _bounded_list(DesignDimensionOutput, _MAX_DIMENSIONS) = Field(
+        default_factory=list,
+        description="3-4 substantial design dimensions capturing the visual essence"
+    )
+
+
+# ============================================================
+# Prompts
+# ============================================================
+
+_IMAGE_ANALYSIS_PROMPT = """You are a design analyst building a library of reusable design tokens.
+Study the attached image and describe the qualities that make it visually distinctive.
+
+ANNOTATION:
+Write a 1-2 sentence annotation describing the image's subject and overall visual character.
+It is used as context when this image guides future generations, so focus on what a designer would want to reuse.
+
+DESIGN DIMENSIONS:
+Identify 3-4 substantial design dimensions that capture the image's visual essence.
+
+Each dimension must have:
+- axis: The design axis it belongs to (colors, composition, layout, aesthetic, or a more specific axis like lighting, mood, or texture)
+- name: An evocative 2-4 word name for the specific manifestation, e.g. "Eerie Green Cast" rather than "Green Colors"
+- description: 2-3 sentences on HOW the dimension manifests, WHAT makes it distinctive, and WHY it creates its effect
+- tags: 2-3 specific design vocabulary tags, e.g. "moody-dark", "rule-of-thirds", "film-noir"
+- generation_prompt: A 2-3 sentence prompt that recreates this dimension as a pure abstract concept image - no recognizable objects, just the design quality itself
+
+Prioritize dimensions that are specific enough to recognize in other images and transferable to other designs.
+"""
+
+# Built once so every analysis request starts with the same leading part,
+# keeping the static prompt prefix byte-identical for implicit caching
+_IMAGE_ANALYSIS_PROMPT_PART = types.Part(text=_IMAGE_ANALYSIS_PROMPT)
+
+
+# Parsed analyze_image results keyed by image content hash (LRU)
+_ANALYSIS_CACHE_SIZE = 512
+_analysis_cache: OrderedDict[bytes, ImageAnalysisResponse] = OrderedDict()
+
+
+# Magic-byte signatures keyed by first byte, so detection is one dict lookup
+# plus a startswith instead of a chain of slice comparisons
+_IMAGE_SIGNATURES: dict[int, tuple[tuple[bytes, ...], str]] = {
+    0x89: ((b'\x89PNG\r\n\x1a\n',), "image/png"),
+    0xFF: ((b'\xff\xd8',), "image/jpeg"),
+    0x47: ((b'GIF87a', b'GIF89a'), "image/gif"),
+}
+
+# ISO Base Media File Format brands (bytes 8-12 after the 'ftyp' box)
+_FTYP_BRANDS = {
+    b'heic': "image/heic", b'heix': "image/heic", b'hevc': "image/heic",
+    b'hevx': "image/heic", b'mif1': "image/heic", b'msf1': "image/heic",
+    b'avif': "image/avif", b'avis': "image/avif",
+}
+
+
 def _detect_image_mime_type(data: bytes) -> str:
     """Detect actual image MIME type from magic bytes."""
-    if data[:8] == b'\x89PNG\r\n\x1a\n':
+    if not data:
         return "image/png"
-    elif data[:2] == b'\xff\xd8':
-        return "image/jpeg"
-    elif data[:4] == b'RIFF' and len(data) > 12 and data[8:12] == b'WEBP':
+    signature = _IMAGE_SIGNATURES.get(data[0])
+    if signature is not None and data.startswith(signature[0]):
+        return signature[1]
+    if data.startswith(b'RIFF') and data.startswith(b'WEBP', 8):
         return "image/webp"
-    elif data[:6] in (b'GIF87a', b'GIF89a'):
-        return "image/gif"
-    elif len(data) > 12 and data[4:8] == b'ftyp':
-        # HEIC/HEIF container (ISO Base Media File Format)
-        brand = data[8:12]
-        if brand in (b'heic', b'heix', b'hevc', b'hevx', b'mif1', b'msf1'):
-            return "image/heic"
-        elif brand in (b'avif', b'avis'):
-            return "image/avif"
+    if data.startswith(b'ftyp', 4):
+        return _FTYP_BRANDS.get(data[8:12], "image/png")
     return "image/png"
 
 
+def _first_candidate_parts(response: types.GenerateContentResponse) -> list[types.Part]:
+    """Return the content parts of the first response candidate.
+
+    The service never sets candidate_count, so Gemini returns one candidate.
+    """
+    if not response.candidates:
+        return []
+    content = response.candidates[0].content
+    if not content or not content.parts:
+        return []
+    return content.parts
+
+
+def _unpack_variations(result: Any) -> tuple[str, list[dict[str, Any]], list[dict[str, Any]] | None]:
+    """Split decoded SceneVariationsResponse JSON into (title, scenes, suggestions).
+
+    Scenes stay plain dicts, so only the top-level shape is checked here; a
+    truncated or malformed response fails naming the field instead of a bare KeyError.
+    Scenes past the schema's maxItems are dropped.
+
+    Raises:
+        ValueError: If a required field is missing or scenes is not a list
+    """
+    if not isinstance(result, dict):
+        raise ValueError("Variation response is not a JSON object")
+    missing = [key for key in ("title", "scenes") if key not in result]
+    if missing:
+        raise ValueError(f"Variation response missing required field(s): {', '.join(missing)}")
+    if not isinstance(result["scenes"], list):
+        raise ValueError("Variation response field 'scenes' is not a list")
+    return result["title"], result["scenes"][:_MAX_SCENES], result.get("annotation_suggestions") or None
+
+
 def _convert_heic_to_jpeg(data: bytes) -> tuple[bytes, str]:
     """Convert HEIC/HEIF image to JPEG for Gemini API compatibility.
 
@@ -126,7 +235,7 @@ def _convert_heic_to_jpeg(data: bytes) -> tuple[bytes, str]:
         img.save(output, format='JPEG', quality=92)
         return output.getvalue(), "image/jpeg"
     except Exception as e:
-        logger.warning(f"Failed to convert HEIC to JPEG: {e}, using original")
+        logger.warning("Failed to convert HEIC to JPEG: %s, using original", e)
         return data, "image/heic"
 
 
@@ -143,9 +252,213 @@ def _normalize_image_for_gemini(data: bytes, mime_type: str) -> tuple[bytes, str
     return data, mime_type
 
 
-@dataclass
+# Text models only need coarse visual cues from context images, so cap the
+# longest edge before upload - full-size photos inflate request size and
+# vision tokens without improving variation or analysis quality
+_VISION_MAX_EDGE = 768
+_VISION_JPEG_QUALITY = 82
+_VISION_CACHE_SIZE = 64
+
+_vision_cache: OrderedDict[bytes, tuple[bytes, str]] = OrderedDict()
+_vision_cache_lock = threading.Lock()
+
+
+def _content_key(data: bytes) -> bytes:
+    """Content hash used to key per-image caches."""
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def _downscale_for_vision(data: bytes, mime_type: str) -> tuple[bytes, str]:
+    """Resize an image to _VISION_MAX_EDGE and re-encode as JPEG.
+
+    Images already within the limit are only format-normalized.
+
+    Returns:
+        Tuple of (image_bytes, mime_type)
+    """
+    import io
+    try:
+        if mime_type in ("image/heic", "image/heif", "image/avif"):
+            import pillow_heif
+            pillow_heif.register_heif_opener()
+        from PIL import Image, ImageOps
+
+        # Image.open only parses the header, so small images exit cheaply
+        img = Image.open(io.BytesIO(data))
+        if max(img.size) <= _VISION_MAX_EDGE:
+            return _normalize_image_for_gemini(data, mime_type)
+
+        # The re-encoded JPEG drops EXIF, so bake the orientation into the pixels
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((_VISION_MAX_EDGE, _VISION_MAX_EDGE), Image.Resampling.LANCZOS)
+        if img.mode in ('RGBA', 'LA', 'P'):
+            # Flatten onto white; convert('RGB') would turn transparent areas black
+            rgba = img.convert('RGBA')
+            img = Image.new('RGB', rgba.size, (255, 255, 255))
+            img.paste(rgba, mask=rgba.getchannel('A'))
+        elif img.mode != 'RGB':
+            img = img.convert('RGB')
+
+        output = io.BytesIO()
+        img.save(output, format='JPEG', quality=_VISION_JPEG_QUALITY)
+        return output.getvalue(), "image/jpeg"
+    except Exception as e:
+        logger.warning("Failed to downscale image for vision input: %s, using original", e)
+        return _normalize_image_for_gemini(data, mime_type)
+
+
+def _prepare_vision_image(data: bytes, mime_type: str, key: bytes | None = None) -> tuple[bytes, str]:
+    """Downscale an image for text-model input, cached by content hash.
+
+    The same context images are sent with request after request, so the
+    decode/resize is done once per image. CPU-bound - call via asyncio.to_thread.
+    Pass key if the caller already has the content hash.
+
+    Returns:
+        Tuple of (image_bytes, mime_type)
+    """
+    if key is None:
+        key = _content_key(data)
+    with _vision_cache_lock:
+        cached = _vision_cache.get(key)
+        if cached is not None:
+            _vision_cache.move_to_end(key)
+            return cached
+
+    prepared = _downscale_for_vision(data, mime_type)
+    with _vision_cache_lock:
+        _vision_cache[key] = prepared
+        if len(_vision_cache) > _VISION_CACHE_SIZE:
+            _vision_cache.popitem(last=False)
+    return prepared
+
+
+def _format_confirmed_dims(confirmed_dims: dict[str, dict]) -> str:
+    """Render a pool image's confirmed design dimensions as one text block."""
+    return "Design Qualities:\n" + "\n".join(
+        f'  - {axis}: "{dim.get("name", "")}" - {dim.get("description", "")} '
+        f'[tags: {", ".join(dim.get("tags") or ())}]'
+        for axis, dim in confirmed_dims.items()
+    )
+
+
+def _image_part(data: bytes, mime_type: str) -> types.Part:
+    """Build the inline image Part sent to Gemini, normalizing HEIC/HEIF/AVIF."""
+    norm_bytes, norm_mime = _normalize_image_for_gemini(data, mime_type)
+    return types.Part.from_bytes(data=norm_bytes, mime_type=norm_mime)
+
+
+def _user_content(items: list[str | types.Part]) -> types.Content:
+    """Wrap interleaved text and image parts as a single user turn.
+
+    The SDK would group a mixed list into the same single Content, but its
+    per-item conversion costs several times more than building it directly.
+    """
+    return types.Content(
+        role="user",
+        parts=[types.Part(text=item) if isinstance(item, str) else item for item in items],
+    )
+
+
+# Safety settings apply the same threshold to all relevant harm categories
+_HARM_CATEGORIES = (
+    "HARM_CATEGORY_HARASSMENT",
+    "HARM_CATEGORY_HATE_SPEECH",
+    "HARM_CATEGORY_SEXUALLY_EXPLICIT",
+    "HARM_CATEGORY_DANGEROUS_CONTENT",
+)
+
+# Stateless tool, shared by every grounded request
+_GOOGLE_SEARCH_TOOL = types.Tool(google_search=types.GoogleSearch())
+
+
+@functools.lru_cache(maxsize=8)
+def _safety_settings_for(safety_level: str) -> list[types.SafetySetting]:
+    """Safety settings for a threshold, shared across image configs."""
+    return [
+        types.SafetySetting(category=category, threshold=safety_level)
+        for category in _HARM_CATEGORIES
+    ]
+
+
+@functools.lru_cache(maxsize=128)
+def _image_generation_config(
+    image_size: str | None = None,
+    aspect_ratio: str | None = None,
+    safety_level: str | None = None,
+    thinking_level: str | None = None,
+    temperature: float | None = None,
+    google_search_grounding: bool | None = None,
+) -> types.GenerateContentConfig:
+    """Build the image generation config for a parameter combination.
+
+    Cached because UI flows reuse the same settings across every prompt in a
+    batch, and each GenerateContentConfig is a fully validated Pydantic model.
+    The returned config is shared - copy it before changing any field.
+    """
+    # Build image config if any image-specific params are set
+    image_config = None
+    if image_size or aspect_ratio:
+        image_config = types.ImageConfig(
+            image_size=image_size,
+            aspect_ratio=aspect_ratio,
+        )
+
+    # Build safety settings if specified
+    safety_settings = _safety_settings_for(safety_level) if safety_level else None
+
+    # Build tools for google search grounding
+    tools = [_GOOGLE_SEARCH_TOOL] if google_search_grounding else None
+
+    # Build config with all parameters
+    config_kwargs: dict[str, Any] = {
+        "response_modalities": ["IMAGE"],
+        "image_config": image_config,
+        "safety_settings": safety_settings,
+    }
+    # thinking_level must be wrapped in ThinkingConfig (not passed directly)
+    if thinking_level:
+        config_kwargs["thinking_config"] = types.ThinkingConfig(
+            thinking_level=thinking_level
+        )
+    if temperature is not None:
+        config_kwargs["temperature"] = temperature
+    if tools:
+        config_kwargs["tools"] = tools
+
+    return types.GenerateContentConfig(**config_kwargs)
+
+
+@functools.lru_cache(maxsize=32)
+def _structured_output_config(
+    response_schema: type[BaseModel],
+    system_instruction: str | None = None,
+    temperature: float | None = None,
+) -> types.GenerateContentConfig:
+    """Build the JSON structured-output config for a response schema.
+
+    Cached per schema (and optional overrides) so the SDK's schema handling
+    happens once rather than on every request. The returned config is shared.
+    """
+    config_kwargs: dict[str, Any] = {
+        "response_mime_type": "application/json",
+        "response_schema": response_schema,
+    }
+    if system_instruction:
+        config_kwargs["system_instruction"] = system_instruction
+    if temperature is not None:
+        config_kwargs["temperature"] = temperature
+
+    return types.GenerateContentConfig(**config_kwargs)
+
+
+@dataclass(slots=True, frozen=True, kw_only=True)
 class ImageResult:
-    """Image generation result."""
+    """Image generation result.
+
+    Images hold raw bytes ({"data": bytes, "mime_type": str}) that callers
+    write to disk directly.
+    """
     text: str | None
     images: list[dict[str, Any]] = field(default_factory=list)
     model: str = ""
@@ -160,9 +473,9 @@ class GeminiService:
         # - 'backend.config' when running as package (uvicorn backend.server:app)
         # - 'config' when running directly or in tests
         try:
-            from backend.config import DEFAULT_TEXT_MODEL, DEFAULT_IMAGE_MODEL, DEFAULT_FAST_TEXT_MODEL, GEMINI_TIMEOUT_MS, get_gemini_api_key
+            from backend.config import DEFAULT_TEXT_MODEL, DEFAULT_IMAGE_MODEL, DEFAULT_FAST_TEXT_MODEL, GEMINI_MAX_CONCURRENCY, GEMINI_TIMEOUT_MS, get_gemini_api_key
         except ImportError:
-            from config import DEFAULT_TEXT_MODEL, DEFAULT_IMAGE_MODEL, DEFAULT_FAST_TEXT_MODEL, GEMINI_TIMEOUT_MS, get_gemini_api_key
+            from config import DEFAULT_TEXT_MODEL, DEFAULT_IMAGE_MODEL, DEFAULT_FAST_TEXT_MODEL, GEMINI_MAX_CONCURRENCY, GEMINI_TIMEOUT_MS, get_gemini_api_key
 
         self.DEFAULT_TEXT_MODEL = DEFAULT_TEXT_MODEL
         self.DEFAULT_IMAGE_MODEL = DEFAULT_IMAGE_MODEL
@@ -172,40 +485,57 @@ class GeminiService:
 
         # Configure HTTP options with extended timeout and retry for image generation
         # Image generation can take longer and may hit rate limits
-        http_options = types.HttpOptions(
+        self._http_options = types.HttpOptions(
             timeout=GEMINI_TIMEOUT_MS,
             retry_options=types.HttpRetryOptions(
                 attempts=3,  # Retry failed requests up to 3 times
             ),
         )
-        self.client = genai.Client(api_key=self.api_key, http_options=http_options)
+
+        # Bound in-flight API requests; callers fan out freely with asyncio.gather
+        self._request_slots = asyncio.Semaphore(GEMINI_MAX_CONCURRENCY)
+
+    @functools.cached_property
+    def client(self) -> genai.Client:
+        """Gemini client, created on first API call rather than at construction."""
+        return genai.Client(api_key=self.api_key, http_options=self._http_options)
+
+    async def aclose(self) -> None:
+        """Close the client's pooled connections, if a client was ever created."""
+        client = self.__dict__.pop("client", None)
+        # AsyncClient.aclose only exists in newer google-genai releases
+        if client is not None and (aclose := getattr(client.aio, "aclose", None)):
+            await aclose()
 
     async def _generate_structured(
         self,
         *,
         prompt: str | None = None,
-        contents: list[Any] | None = None,
+        contents: types.Content | None = None,
         response_schema: type[T],
         model: str | None = None,
         images: list[tuple[bytes, str, str | None]] | None = None,
         system_instruction: str | None = None,
         operation_name: str = "generation",
         temperature: float | None = None,
-    ) -> T:
+        validate: bool = True,
+    ) -> T | dict[str, Any]:
         """Unified structured JSON generation with image interleaving.
 
         Args:
             prompt: Simple text prompt (mutually exclusive with contents)
-            contents: Pre-built contents list with interleaved images (mutually exclusive with prompt)
+            contents: Pre-built user Content with interleaved images (mutually exclusive with prompt)
             response_schema: Pydantic model class for structured output
             model: Model to use (defaults to DEFAULT_TEXT_MODEL)
             images: Optional list of (bytes, mime_type, label) tuples to interleave (only with prompt)
             system_instruction: Optional system instruction
             operation_name: Name for logging
             temperature: Optional temperature setting
+            validate: If False, return the decoded JSON dict without building
+                the model - for results that are only turned back into dicts
 
         Returns:
-            Parsed Pydantic model instance
+            Parsed Pydantic model instance (or plain dict when validate=False)
         """
         if contents is not None and prompt is not None:
             raise ValueError("Provide either 'prompt' or 'contents', not both")
@@ -213,56 +543,49 @@ class GeminiService:
             raise ValueError("Must provide either 'prompt' or 'contents'")
 
         model_name = model or self.DEFAULT_TEXT_MODEL
-        start_time = time.time()
-
-        # Build config
-        config_kwargs: dict[str, Any] = {
-            "response_mime_type": "application/json",
-            "response_schema": response_schema,
-        }
-        if system_instruction:
-            config_kwargs["system_instruction"] = system_instruction
-        if temperature is not None:
-            config_kwargs["temperature"] = temperature
+        start_time = time.perf_counter()
 
-        config = types.GenerateContentConfig(**config_kwargs)
+        config = _structured_output_config(response_schema, system_instruction, temperature)
 
         # Build contents: use pre-built contents, or build from prompt + images
         if contents is not None:
             final_contents = contents
-            num_images = sum(1 for c in contents if hasattr(c, 'inline_data') or (hasattr(c, 'data') and hasattr(c, 'mime_type')))
+            num_images = sum(1 for part in contents.parts or () if part.inline_data)
         elif images:
-            final_contents: list[Any] = [prompt]
+            items: list[str | types.Part] = [prompt]
             for img_bytes, mime_type, label in images:
                 if label:
-                    final_contents.append(f"\n{label}:")
-                # Normalize HEIC/HEIF to JPEG for Gemini compatibility
-                norm_bytes, norm_mime = _normalize_image_for_gemini(img_bytes, mime_type)
-                final_contents.append(types.Part.from_bytes(data=norm_bytes, mime_type=norm_mime))
+                    items.append(f"\n{label}:")
+                items.append(_image_part(img_bytes, mime_type))
+            final_contents = _user_content(items)
             num_images = len(images)
         else:
             final_contents = prompt
             num_images = 0
 
-        logger.info(f"[{operation_name}] Starting with model={model_name}, images={num_images}")
+        logger.info("[%s] Starting with model=%s, images=%d", operation_name, model_name, num_images)
 
         try:
-            response = await self.client.aio.models.generate_content(
-                model=model_name,
-                contents=final_contents,
-                config=config,
-            )
+            async with self._request_slots:
+                response = await self.client.aio.models.generate_content(
+                    model=model_name,
+                    contents=final_contents,
+                    config=config,
+                )
         except Exception as e:
-            elapsed = time.time() - start_time
-            logger.error(f"[{operation_name}] Failed after {elapsed:.1f}s: {e}")
+            elapsed = time.perf_counter() - start_time
+            logger.error("[%s] Failed after %.1fs: %s", operation_name, elapsed, e)
             raise
 
-        elapsed = time.time() - start_time
+        elapsed = time.perf_counter() - start_time
 
-        # Parse structured response
-        result = response_schema.model_validate_json(response.text)
+        # Parse structured response (Gemini has already enforced the schema)
+        if validate:
+            result = response_schema.model_validate_json(response.text)
+        else:
+            result = json.loads(response.text)
 
-        logger.info(f"[{operation_name}] Completed in {elapsed:.1f}s")
+        logger.info("[%s] Completed in %.1fs", operation_name, elapsed)
         return result
 
     async def generate_image(
@@ -292,143 +615,96 @@ class GeminiService:
             google_search_grounding: Enable real-time web grounding for image gen
         """
         model_name = self.DEFAULT_IMAGE_MODEL
-        start_time = time.time()
-
-        num_images = len(context_images) if context_images else 0
-        params_info = []
-        if image_size:
-            params_info.append(f"size={image_size}")
-        if aspect_ratio:
-            params_info.append(f"ratio={aspect_ratio}")
-        if seed is not None:
-            params_info.append(f"seed={seed}")
-        if thinking_level:
-            params_info.append(f"thinking={thinking_level}")
-        if temperature is not None:
-            params_info.append(f"temp={temperature}")
-        if google_search_grounding:
-            params_info.append("search=on")
-        params_str = f" ({', '.join(params_info)})" if params_info else ""
-        print(f"[{model_name}] Generating image with {num_images} context image(s){params_str}...")
-
-        # Log image generation request
-        logger.info(f"Image generation request: model={model_name}, context_images={num_images}, params={params_info}")
-        logger.debug(f"Image prompt: {prompt[:200]}{'...' if len(prompt) > 200 else ''}")
-
-        # Build image config if any image-specific params are set
-        image_config = None
-        if image_size or aspect_ratio:
-            image_config = types.ImageConfig(
-                image_size=image_size,
-                aspect_ratio=aspect_ratio,
+        start_time = time.perf_counter()
+
+        # Log image generation request; the params summary exists only for this line
+        if logger.isEnabledFor(logging.INFO):
+            params_info = []
+            if image_size:
+                params_info.append(f"size={image_size}")
+            if aspect_ratio:
+                params_info.append(f"ratio={aspect_ratio}")
+            if seed is not None:
+                params_info.append(f"seed={seed}")
+            if thinking_level:
+                params_info.append(f"thinking={thinking_level}")
+            if temperature is not None:
+                params_info.append(f"temp={temperature}")
+            if google_search_grounding:
+                params_info.append("search=on")
+            logger.info(
+                "Image generation request: model=%s, context_images=%d, params=%s",
+                model_name, len(context_images or ()), params_info,
             )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Image prompt: %.200s%s", prompt, "..." if len(prompt) > 200 else "")
 
-        # Build safety settings if specified
-        safety_settings = None
-        if safety_level:
-            # Apply to all relevant harm categories
-            harm_categories = [
-                "HARM_CATEGORY_HARASSMENT",
-                "HARM_CATEGORY_HATE_SPEECH",
-                "HARM_CATEGORY_SEXUALLY_EXPLICIT",
-                "HARM_CATEGORY_DANGEROUS_CONTENT",
-            ]
-            safety_settings = [
-                types.SafetySetting(category=cat, threshold=safety_level)
-                for cat in harm_categories
-            ]
-
-        # Build tools for google search grounding
-        tools = None
-        if google_search_grounding:
-            tools = [types.Tool(google_search=types.GoogleSearch())]
-
-        # Build config with all parameters
-        config_kwargs: dict[str, Any] = {
-            "response_modalities": ["IMAGE"],
-            "image_config": image_config,
-            "safety_settings": safety_settings,
-            "seed": seed,
-        }
-        # thinking_level must be wrapped in ThinkingConfig (not passed directly)
-        if thinking_level:
-            config_kwargs["thinking_config"] = types.ThinkingConfig(
-                thinking_level=thinking_level
-            )
-        if temperature is not None:
-            config_kwargs["temperature"] = temperature
-        if tools:
-            config_kwargs["tools"] = tools
-
-        config = types.GenerateContentConfig(**config_kwargs)
+        config = _image_generation_config(
+            image_size=image_size,
+            aspect_ratio=aspect_ratio,
+            safety_level=safety_level,
+            thinking_level=thinking_level,
+            temperature=temperature,
+            google_search_grounding=google_search_grounding,
+        )
+        # Seed varies per request, so keep it out of the cache key
+        if seed is not None:
+            config = config.model_copy(update={"seed": seed})
 
         # Build interleaved contents: [img1, caption1, img2, caption2, ..., prompt]
         if context_images:
-            contents = []
+            items: list[str | types.Part] = []
             for i, (img_bytes, mime_type, caption) in enumerate(context_images):
-                # Normalize HEIC/HEIF to JPEG for Gemini compatibility
-                norm_bytes, norm_mime = _normalize_image_for_gemini(img_bytes, mime_type)
-                contents.append(types.Part.from_bytes(data=norm_bytes, mime_type=norm_mime))
+                items.append(_image_part(img_bytes, mime_type))
                 if caption:
-                    contents.append(f"Reference {i+1}: {caption}")
-            contents.append(prompt)
+                    items.append(f"Reference {i+1}: {caption}")
+            items.append(prompt)
+            contents = _user_content(items)
         else:
             contents = prompt
 
         try:
-            response = await self.client.aio.models.generate_content(
-                model=model_name,
-                contents=contents,
-                config=config,
-            )
-        except Exception as e:
-            elapsed = time.time() - start_time
-            # Log detailed error information
-            error_msg = str(e)
-            error_type = type(e).__name__
-            print(f"[ERROR] Generation failed after {elapsed:.1f}s")
-            print(f"  Error Type: {error_type}")
-            print(f"  Error Message: {error_msg}")
-            if hasattr(e, 'status_code'):
-                print(f"  Status Code: {e.status_code}")
-            if hasattr(e, 'reason'):
-                print(f"  Reason: {e.reason}")
+            async with self._request_slots:
+                response = await self.client.aio.models.generate_content(
+                    model=model_name,
+                    contents=contents,
+                    config=config,
+                )
+        except Exception:
+            elapsed = time.perf_counter() - start_time
+            # Traceback carries the error type, message and API status details
+            logger.exception("[ERROR] Image generation failed after %.1fs", elapsed)
             raise
 
-        elapsed = time.time() - start_time
+        elapsed = time.perf_counter() - start_time
 
         text = None
-        images = []
-
-        if response.candidates:
-            for candidate in response.candidates:
-                if candidate.content and candidate.content.parts:
-                    for part in candidate.content.parts:
-                        if hasattr(part, "text") and part.text:
-                            text = part.text
-                        if hasattr(part, "inline_data") and part.inline_data:
-                            inline = part.inline_data
-                            if hasattr(inline, "data") and inline.data:
-                                actual_mime = _detect_image_mime_type(inline.data)
-                                images.append({
-                                    "data": base64.b64encode(inline.data).decode("utf-8"),
-                                    "mime_type": actual_mime,
-                                })
+        raw_images: list[bytes] = []
+
+        # Parts are typed SDK models, so unset fields are None rather than missing
+        for part in _first_candidate_parts(response):
+            if part.text:
+                text = part.text
+            if part.inline_data is not None and part.inline_data.data:
+                raw_images.append(part.inline_data.data)
+
+        images = [
+            {"data": data, "mime_type": _detect_image_mime_type(data)}
+            for data in raw_images
+        ]
 
         usage = None
-        if hasattr(response, "usage_metadata") and response.usage_metadata:
+        if meta := response.usage_metadata:
             usage = {
-                "prompt_tokens": getattr(response.usage_metadata, "prompt_token_count", None),
-                "completion_tokens": getattr(response.usage_metadata, "candidates_token_count", None),
-                "total_tokens": getattr(response.usage_metadata, "total_token_count", None),
+                "prompt_tokens": meta.prompt_token_count,
+                "completion_tokens": meta.candidates_token_count,
+                "total_tokens": meta.total_token_count,
             }
 
-        print(f"[OK] Generated {len(images)} image(s) in {elapsed:.1f}s")
-
         # Log image generation response
-        logger.info(f"Image generation response: images={len(images)}, elapsed={elapsed:.1f}s, usage={usage}")
-        if text:
-            logger.debug(f"Image response text: {text[:200]}{'...' if len(text) > 200 else ''}")
+        logger.info("Image generation response: images=%d, elapsed=%.1fs, usage=%s", len(images), elapsed, usage)
+        if text and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Image response text: %.200s%s", text, "..." if len(text) > 200 else "")
 
         return ImageResult(
             text=text,
@@ -437,13 +713,51 @@ class GeminiService:
             usage=usage,
         )
 
+    async def analyze_image(
+        self,
+        image_bytes: bytes,
+        mime_type: str,
+    ) -> ImageAnalysisResponse:
+        """Extract an annotation and design dimensions from an image.
+
+        Uses structured JSON output so the schema is enforced by the API,
+        with no fence stripping or free-form JSON parsing on our side.
+
+        Args:
+            image_bytes: Raw image data
+            mime_type: MIME type of the image
+
+        Returns:
+            ImageAnalysisResponse with annotation and design dimensions
+        """
+        # Analysis depends only on the image, so re-analyzing the same upload
+        # (retries, re-imports) is served from the cache
+        key = _content_key(image_bytes)
+        if (cached := _analysis_cache.get(key)) is not None:
+            _analysis_cache.move_to_end(key)
+            logger.info("[analyze_image] Cache hit")
+            return cached.model_copy(deep=True)
+
+        image_bytes, mime_type = await asyncio.to_thread(_prepare_vision_image, image_bytes, mime_type, key)
+        analysis = await self._generate_structured(
+            contents=_user_content([_IMAGE_ANALYSIS_PROMPT_PART, _image_part(image_bytes, mime_type)]),
+            response_schema=ImageAnalysisResponse,
+            model=self.DEFAULT_FAST_TEXT_MODEL,
+            operation_name="analyze_image",
+        )
+
+        _analysis_cache[key] = analysis.model_copy(deep=True)
+        if len(_analysis_cache) > _ANALYSIS_CACHE_SIZE:
+            _analysis_cache.popitem(last=False)
+        return analysis
+
     def _build_variation_contents(
         self,
         prompt: str,
         context_images: list[tuple[bytes, str, str | None]] | None = None,
         context_image_pool: list[tuple[str, bytes, str, str | None, dict | None]] | None = None,
-    ) -> list[Any] | str:
-        """Build contents list with interleaved images for variation generation.
+    ) -> types.Content | str:
+        """Build contents with interleaved images for variation generation.
 
         Args:
             prompt: The formatted prompt string
@@ -451,13 +765,16 @@ class GeminiService:
             context_image_pool: New format - list of (id, bytes, mime_type, caption, dims, [liked_axes])
 
         Returns:
-            Contents list with interleaved images, or just the prompt string if no images
+            A single user Content with interleaved images, or just the prompt string if no images
         """
         has_pool = context_image_pool is not None and len(context_image_pool) > 0
         has_legacy = context_images is not None and len(context_images) > 0
 
         if has_pool:
-            contents: list[Any] = [prompt]
+            items: list[str | types.Part] = [prompt]
+            # Identical files pinned under different IDs are uploaded once;
+            # later IDs point back to the first so the model can still assign them
+            first_id_by_key: dict[bytes, str] = {}
             for pool_item in context_image_pool:
                 # Handle both old (5-tuple) and new (6-tuple) formats
                 if len(pool_item) == 6:
@@ -466,35 +783,31 @@ class GeminiService:
                     img_id, img_bytes, mime_type, caption, confirmed_dims = pool_item
                     liked_dim_axes = None
 
-                contents.append(f"\n\nImage ID: {img_id}")
-                contents.append(f"Annotation: {caption or '(none)'}")
+                # One text part per image instead of one per line keeps the
+                # request's parts array short
+                key = _content_key(img_bytes)
+                duplicate_of = first_id_by_key.setdefault(key, img_id)
+                id_line = f"\n\nImage ID: {img_id}"
+                if duplicate_of != img_id:
+                    id_line += f" (same image as {duplicate_of})"
+                header = [id_line, f"Annotation: {caption or '(none)'}"]
                 if confirmed_dims:
-                    dims_text = []
-                    for axis, dim in confirmed_dims.items():
-                        dim_name = dim.get("name", "")
-                        dim_desc = dim.get("description", "")
-                        dim_tags = dim.get("tags", [])
-                        tags_str = ", ".join(dim_tags) if dim_tags else ""
-                        dims_text.append(f"  - {axis}: \"{dim_name}\" - {dim_desc} [tags: {tags_str}]")
-                    if dims_text:
-                        contents.append(f"Design Qualities:\n" + "\n".join(dims_text))
+                    header.append(_format_confirmed_dims(confirmed_dims))
                 if liked_dim_axes:
-                    contents.append(f"User's Preferred Dimensions: {', '.join(liked_dim_axes)}")
-                # Normalize HEIC/HEIF to JPEG for Gemini compatibility
-                norm_bytes, norm_mime = _normalize_image_for_gemini(img_bytes, mime_type)
-                contents.append(types.Part.from_bytes(data=norm_bytes, mime_type=norm_mime))
-            return contents
+                    header.append(f"User's Preferred Dimensions: {', '.join(liked_dim_axes)}")
+                items.append("\n".join(header))
+                if duplicate_of == img_id:
+                    items.append(_image_part(*_prepare_vision_image(img_bytes, mime_type, key)))
+            return _user_content(items)
         elif has_legacy:
-            contents = [prompt]
+            items = [prompt]
             for i, (img_bytes, mime_type, caption) in enumerate(context_images):
-                # Normalize HEIC/HEIF to JPEG for Gemini compatibility
-                norm_bytes, norm_mime = _normalize_image_for_gemini(img_bytes, mime_type)
-                contents.append(types.Part.from_bytes(data=norm_bytes, mime_type=norm_mime))
+                items.append(_image_part(*_prepare_vision_image(img_bytes, mime_type)))
                 if caption:
-                    contents.append(f"Reference {i+1} caption: {caption}")
+                    items.append(f"Reference {i+1} caption: {caption}")
                 else:
-                    contents.append(f"Reference {i+1}: (no caption provided)")
-            return contents
+                    items.append(f"Reference {i+1}: (no caption provided)")
+            return _user_content(items)
         else:
             return prompt
 
@@ -518,55 +831,78 @@ class GeminiService:
         - {"type": "complete", "title": str, "scenes": [...], "annotation_suggestions": [...]}
         - {"type": "error", "error": str}
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
 
         # Determine image counts for logging
         has_pool = context_image_pool is not None and len(context_image_pool) > 0
         has_legacy = context_images is not None and len(context_images) > 0
         num_images = len(context_image_pool) if has_pool else (len(context_images) if has_legacy else 0)
 
-        # Build contents with images (prompt is already complete from frontend)
-        contents = self._build_variation_contents(prompt, context_images, context_image_pool)
-
-        config = types.GenerateContentConfig(
-            response_mime_type="application/json",
-            response_schema=SceneVariationsResponse,
+        # Build contents with images in a worker thread - downscaling decodes each image
+        # (prompt is already complete from frontend)
+        contents = await asyncio.to_thread(
+            self._build_variation_contents, prompt, context_images, context_image_pool
         )
 
-        logger.info(f"[STREAMING] Generating {count} variations ({num_images} context images)")
-
+        config = _structured_output_config(SceneVariationsResponse)
+
+        logger.info("[STREAMING] Generating %d variations (%d context images)", count, num_images)
+
+        # Only the upstream read holds a request slot. Chunks are handed over
+        # through a queue, so a slow SSE client can't pin a slot while it drains
+        chunk_queue: asyncio.Queue[str | None] = asyncio.Queue()
+
+        async def pump() -> None:
+            try:
+                async with self._request_slots:
+                    stream = await self.client.aio.models.generate_content_stream(
+                        model=self.DEFAULT_TEXT_MODEL,
+                        contents=contents,
+                        config=config,
+                    )
+                    # Close the upstream response even when the pump is cancelled
+                    async with contextlib.aclosing(stream):
+                        async for chunk in stream:
+                            for part in _first_candidate_parts(chunk):
+                                if part.text:
+                                    chunk_queue.put_nowait(part.text)
+            finally:
+                chunk_queue.put_nowait(None)
+
+        pump_task = asyncio.create_task(pump())
         try:
-            accumulated_text = ""
-            stream = await self.client.aio.models.generate_content_stream(
-                model=self.DEFAULT_TEXT_MODEL,
-                contents=contents,
-                config=config,
-            )
-            async for chunk in stream:
-                if chunk.candidates:
-                    for candidate in chunk.candidates:
-                        if candidate.content and candidate.content.parts:
-                            for part in candidate.content.parts:
-                                if hasattr(part, "text") and part.text:
-                                    accumulated_text += part.text
-                                    yield {"type": "chunk", "text": part.text}
+            # Collect chunks and join once; repeated += copies the whole buffer
+            text_chunks: list[str] = []
+            while (text := await chunk_queue.get()) is not None:
+                text_chunks.append(text)
+                yield {"type": "chunk", "text": text}
+            # Re-raise anything the upstream read failed with
+            await pump_task
 
-            elapsed = time.time() - start_time
-            result = SceneVariationsResponse.model_validate_json(accumulated_text)
+            elapsed = time.perf_counter() - start_time
+            # Gemini already enforces the schema, and the server validates each
+            # scene into PromptVariation - plain dicts skip a model round trip
+            title, scenes, suggestions = _unpack_variations(json.loads("".join(text_chunks)))
 
-            logger.info(f"[STREAMING] Completed: title='{result.title}', {len(result.scenes)} scenes in {elapsed:.1f}s")
+            logger.info("[STREAMING] Completed: title='%s', %d scenes in %.1fs", title, len(scenes), elapsed)
 
             yield {
                 "type": "complete",
-                "title": result.title,
-                "scenes": [scene.model_dump() for scene in result.scenes],
-                "annotation_suggestions": [s.model_dump() for s in result.annotation_suggestions] if result.annotation_suggestions else None,
+                "title": title,
+                "scenes": scenes,
+                "annotation_suggestions": suggestions,
             }
 
         except Exception as e:
-            elapsed = time.time() - start_time
-            logger.error(f"[STREAMING] Failed after {elapsed:.1f}s: {e}")
+            elapsed = time.perf_counter() - start_time
+            logger.error("[STREAMING] Failed after %.1fs: %s", elapsed, e)
             yield {"type": "error", "error": str(e)}
+        finally:
+            # The consumer may stop early; stop the pump and retrieve its outcome
+            # so a late upstream failure isn't logged as never retrieved
+            pump_task.cancel()
+            with contextlib.suppress(BaseException):
+                await pump_task
 
     async def generate_prompt_variations(
         self,
@@ -574,7 +910,7 @@ class GeminiService:
         count: int,
         context_images: list[tuple[bytes, str, str | None]] | None = None,
         context_image_pool: list[tuple[str, bytes, str, str | None, dict | None]] | None = None,
-    ) -> tuple[str, list[SceneVariation], list[AnnotationSuggestion] | None]:
+    ) -> tuple[str, list[dict[str, Any]], list[dict[str, Any]] | None]:
         """Generate varied prompt descriptions using structured JSON output.
 
         Args:
@@ -584,25 +920,30 @@ class GeminiService:
             context_image_pool: Optional context images with IDs
 
         Returns:
-            Tuple of (title, list of SceneVariation objects, optional annotation suggestions)
+            Tuple of (title, scene dicts, optional annotation suggestion dicts),
+            shaped like SceneVariation and AnnotationSuggestion
         """
         # Determine image counts for logging
         has_pool = context_image_pool is not None and len(context_image_pool) > 0
         has_legacy = context_images is not None and len(context_images) > 0
         num_images = len(context_image_pool) if has_pool else (len(context_images) if has_legacy else 0)
 
-        # Build contents with images (prompt is already complete from frontend)
-        contents = self._build_variation_contents(prompt, context_images, context_image_pool)
+        # Build contents with images in a worker thread - downscaling decodes each image
+        # (prompt is already complete from frontend)
+        contents = await asyncio.to_thread(
+            self._build_variation_contents, prompt, context_images, context_image_pool
+        )
 
         # Use _generate_structured for consistent handling
         result = await self._generate_structured(
-            contents=contents if isinstance(contents, list) else None,
+            contents=contents if isinstance(contents, types.Content) else None,
             prompt=contents if isinstance(contents, str) else None,
             response_schema=SceneVariationsResponse,
             operation_name=f"variations({count}, {num_images} images)",
+            validate=False,
         )
 
-        return result.title, result.scenes, result.annotation_suggestions
+        return _unpack_variations(result)
 
     async def generate_concept_image(
         self,
@@ -622,8 +963,7 @@ class GeminiService:
         Returns:
             ImageResult with generated concept image
         """
-        start_time = time.time()
-        print(f"[→] Generating concept image...")
+        logger.info("Generating concept image (source image: %s)", source_image_bytes is not None)
 
         # If source image provided, use it as context for the generation
         context_images = None
@@ -11,6 +11,22 @@ from typing import IO, AsyncIterator, Callable, TypeVar, Awaitable
 
 T = TypeVar("T")
 
+# Every mutation rewrites the whole file under the lock; orjson encodes it
+# ~15x faster than the stdlib's pure-Python indent encoder. The output is
+# equivalent, not identical: both write raw UTF-8 and stringify non-str keys,
+# but orjson spells some floats differently (1e16 vs 1e+16) and writes
+# NaN/Infinity as null.
+try:
+    from orjson import OPT_INDENT_2, OPT_NON_STR_KEYS, dumps as _orjson_dumps, loads as _json_loads
+
+    def _dump_json(data: dict) -> bytes:
+        return _orjson_dumps(data, option=OPT_INDENT_2 | OPT_NON_STR_KEYS)
+except ImportError:
+    from json import loads as _json_loads
+
+    def _dump_json(data: dict) -> bytes:
+        return json.dumps(data, indent=2, ensure_ascii=False).encode()
+
 
 class MetadataManager:
     """Manages metadata loading, saving, and common operations.
@@ -179,8 +195,8 @@ class MetadataManager:
             dict: The metadata dictionary
         """
         if self.metadata_path.exists():
-            with open(self.metadata_path) as f:
-                data = json.load(f)
+            with open(self.metadata_path, "rb") as f:
+                data = _json_loads(f.read())
                 # Migration: ensure prompts structure exists
                 if "prompts" not in data:
                     data["prompts"] = []
@@ -257,8 +273,8 @@ class MetadataManager:
         Args:
             data: The metadata dictionary to save
         """
-        with open(self.metadata_path, "w") as f:
-            json.dump(data, f, indent=2)
+        with open(self.metadata_path, "wb") as f:
+            f.write(_dump_json(data))
 
     def find_image_by_id(
         self, metadata: dict, image_id: str
@@ -13,7 +13,7 @@ from .vector_store import get_vector_store
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class SearchResult:
     """A single search result."""
 
@@ -10,16 +10,18 @@ Sessions are managed client-side. The server manages prompts and images.
 """
 
 import asyncio
-import base64
+import atexit
 import io
 import json
 import logging
 import os
+import queue
 import re
 import uuid
 import zipfile
 import aiohttp
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 
 from contextlib import asynccontextmanager
@@ -42,14 +44,18 @@ ThinkingLevelType = Literal["low", "high"]
 # - 'import server' from backend directory (uses bare imports in tests)
 try:
     from backend.metadata_manager import MetadataManager
-    from backend.gemini_service import GeminiService, _detect_image_mime_type, _convert_heic_to_jpeg
+    from backend.gemini_service import (
+        DesignTags, GeminiService, _MAX_DIMENSIONS, _MAX_TAGS, _detect_image_mime_type, _convert_heic_to_jpeg,
+    )
     from backend.prompt_engineering import PromptEngineeringService
     from backend import config
     from backend.search.indexer import get_background_indexer
     from backend.search.search_service import get_search_service
 except ImportError:
     from metadata_manager import MetadataManager
-    from gemini_service import GeminiService, _detect_image_mime_type, _convert_heic_to_jpeg
+    from gemini_service import (
+        DesignTags, GeminiService, _MAX_DIMENSIONS, _MAX_TAGS, _detect_image_mime_type, _convert_heic_to_jpeg,
+    )
     from prompt_engineering import PromptEngineeringService
     import config
     from search.indexer import get_background_indexer
@@ -64,14 +70,21 @@ METADATA_PATH = IMAGES_DIR / "metadata.json"
 LOG_DIR = BASE_DIR / "logs"
 LOG_DIR.mkdir(exist_ok=True)
 
+# Records are formatted by the QueueHandler and written to the file and
+# console by a listener thread, so request handlers never block on log I/O
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s | %(levelname)s | %(message)s",
-    handlers=[
-        logging.FileHandler(LOG_DIR / "server.log"),
-        logging.StreamHandler(),
-    ],
+    handlers=[QueueHandler(_log_queue)],
 )
+_log_listener = QueueListener(
+    _log_queue,
+    logging.FileHandler(LOG_DIR / "server.log"),
+    logging.StreamHandler(),
+)
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logger = logging.getLogger(__name__)
 
 
@@ -94,6 +107,9 @@ async def lifespan(app: FastAPI):
         indexer = get_background_indexer(IMAGES_DIR)
         await indexer.stop()
 
+    # Release the Gemini client's keep-alive connection pool
+    await gemini.aclose()
+
 
 app = FastAPI(title="Gemini Pageant API", lifespan=lifespan)
 
@@ -455,13 +471,13 @@ async def _generate_single_image(
         sanitized_title = _sanitize_filename(title)
         image_id = f"{timestamp}-{sanitized_title}-{index + 1}"
 
-        # Save image
+        # Save image; multi-MB writes go to a worker thread so parallel
+        # generations aren't stalled behind each other's disk I/O
         img_data = result.images[0]
-        img_bytes = base64.b64decode(img_data["data"])
         ext = "png" if "png" in img_data["mime_type"] else "jpg"
         img_filename = f"{image_id}.{ext}"
         img_path = IMAGES_DIR / img_filename
-        img_path.write_bytes(img_bytes)
+        await asyncio.to_thread(img_path.write_bytes, img_data["data"])
 
         return {
             "success": True,
@@ -478,8 +494,42 @@ async def _generate_single_image(
         return {"success": False, "error": str(e), "index": index, "error_type": error_type}
 
 
-def _find_image_by_id(metadata: dict, image_id: str) -> tuple[dict | None, Path | None]:
-    """Find an image by ID and return its data and path."""
+def _image_index(metadata: dict) -> dict[str, list[tuple[dict, dict]]]:
+    """Map image ID -> (image data, parent prompt) entries in a single pass over the prompts.
+
+    Entries keep scan order, and duplicate IDs keep every entry so an indexed
+    lookup falls through to a later entry when an earlier file is missing,
+    just like the unindexed scan.
+    """
+    index: dict[str, list[tuple[dict, dict]]] = {}
+    for prompt_data in metadata.get("prompts", []):
+        for img in prompt_data.get("images", []):
+            index.setdefault(img["id"], []).append((img, prompt_data))
+    return index
+
+
+def _parent_prompt(index: dict[str, list[tuple[dict, dict]]], img_data: dict) -> dict:
+    """Return the prompt an indexed image entry belongs to."""
+    return next(prompt for img, prompt in index[img_data["id"]] if img is img_data)
+
+
+def _find_image_by_id(
+    metadata: dict,
+    image_id: str,
+    index: dict[str, list[tuple[dict, dict]]] | None = None,
+) -> tuple[dict | None, Path | None]:
+    """Find an image by ID and return its data and path.
+
+    Callers resolving many IDs should pass an index from _image_index; without
+    one, every lookup rescans all prompts.
+    """
+    if index is not None:
+        for img, _ in index.get(image_id, ()):
+            img_path = IMAGES_DIR / img["image_path"]
+            if img_path.exists():
+                return img, img_path
+        return None, None
+
     for prompt_data in metadata.get("prompts", []):
         for img in prompt_data.get("images", []):
             if img["id"] == image_id:
@@ -511,27 +561,20 @@ def _scene_to_variation(scene: dict) -> PromptVariation:
     """Convert a scene dict from gemini service to PromptVariation.
 
     Used by both SSE and non-SSE generate-prompts endpoints to share formatting logic.
-    Handles both dict (from SSE JSON) and Pydantic object (from direct call) inputs.
+    Scenes are unvalidated JSON from the model, so optional keys may be missing
+    or null; they fall back to SceneVariation's defaults, and lists are trimmed
+    to its bounds.
     """
-    # Handle design dimensions - may be Pydantic objects or dicts
-    dims = scene.get("design_dimensions", [])
-    if dims and hasattr(dims[0], "model_dump"):
-        dims = [dim.model_dump() for dim in dims]
-
-    # Handle design - may be Pydantic object or dict
-    design = scene.get("design", {})
-    if hasattr(design, "model_dump"):
-        design = design.model_dump()
-
+    design = scene.get("design") or {}
     return PromptVariation(
         id=f"var-{uuid.uuid4().hex[:8]}",
-        text=scene.get("description", ""),
-        title=scene.get("title", ""),
-        mood=scene.get("mood", ""),
-        type=scene.get("type", ""),
-        design=design,
-        design_dimensions=dims,
-        recommended_context_ids=scene.get("recommended_context_ids", []),
+        text=scene.get("description") or "",
+        title=scene.get("title") or "",
+        mood=scene.get("mood") or "",
+        type=scene.get("type") or "",
+        design={axis: (design.get(axis) or [])[:_MAX_TAGS] for axis in DesignTags.model_fields},
+        design_dimensions=(scene.get("design_dimensions") or [])[:_MAX_DIMENSIONS],
+        recommended_context_ids=scene.get("recommended_context_ids") or [],
         context_reasoning=scene.get("context_reasoning"),
     )
 
@@ -543,8 +586,9 @@ def _load_context_images(metadata: dict, image_ids: list[str]) -> list[tuple[byt
     The context_description includes the user's annotation AND their liked tags.
     """
     context_images = []
+    index = _image_index(metadata)
     for img_id in image_ids:
-        img_data, img_path = _find_image_by_id(metadata, img_id)
+        img_data, img_path = _find_image_by_id(metadata, img_id, index)
         if img_data and img_path:
             # Only send annotation to API (notes are user workspace only)
             # Support both old "caption" field and new "annotation" field
@@ -583,8 +627,9 @@ def _load_context_image_pool(metadata: dict, image_ids: list[str]) -> list[tuple
     Note: The annotation includes both the user's text annotation AND their liked design tags.
     """
     pool = []
+    index = _image_index(metadata)
     for img_id in image_ids:
-        img_data, img_path = _find_image_by_id(metadata, img_id)
+        img_data, img_path = _find_image_by_id(metadata, img_id, index)
         if img_data and img_path:
             # Support both old "caption" field and new "annotation" field
             annotation = img_data.get("annotation") or img_data.get("caption", "") or ""
@@ -665,7 +710,7 @@ async def generate_prompt_variations_stream(
     metadata = load_metadata()
     context_image_pool = None
     if image_ids:
-        context_image_pool = _load_context_image_pool(metadata, image_ids)
+        context_image_pool = await asyncio.to_thread(_load_context_image_pool, metadata, image_ids)
         if context_image_pool:
             logger.info(f"[SSE] Loaded {len(context_image_pool)} context image(s)")
 
@@ -745,12 +790,11 @@ async def generate_prompt_variations(req: GeneratePromptsRequest):
     metadata = load_metadata()
     context_image_pool = None
     if req.context_image_ids:
-        context_image_pool = _load_context_image_pool(metadata, req.context_image_ids)
-        if context_image_pool:
-            pool_summary = [(item[0], item[3][:30] if item[3] else "(no annotation)") for item in context_image_pool]
-            logger.info(f"[CONTEXT TRACE] Phase 1 - Loaded {len(context_image_pool)} context image(s) as pool:")
-            for img_id, ann_preview in pool_summary:
-                logger.info(f"  - {img_id}: {ann_preview}...")
+        context_image_pool = await asyncio.to_thread(_load_context_image_pool, metadata, req.context_image_ids)
+        if context_image_pool and logger.isEnabledFor(logging.INFO):
+            logger.info("[CONTEXT TRACE] Phase 1 - Loaded %d context image(s) as pool:", len(context_image_pool))
+            for item in context_image_pool:
+                logger.info("  - %s: %.30s...", item[0], item[3] or "(no annotation)")
 
     try:
         # Use structured output for guaranteed JSON response
@@ -763,18 +807,17 @@ async def generate_prompt_variations(req: GeneratePromptsRequest):
         logger.info(f"Received title='{generated_title}', {len(scene_variations)} structured scene variations")
 
         # Log per-variation context assignments from the text model
-        if context_image_pool:
-            logger.info(f"[CONTEXT TRACE] Text model returned per-variation context assignments:")
+        if context_image_pool and logger.isEnabledFor(logging.INFO):
+            logger.info("[CONTEXT TRACE] Text model returned per-variation context assignments:")
             for i, scene in enumerate(scene_variations[:count]):
-                ctx_ids = scene.recommended_context_ids or []
-                reasoning = scene.context_reasoning or "(no reasoning)"
-                logger.info(f"  - Variation {i+1} ({scene.mood}): {len(ctx_ids)} context(s) = {ctx_ids}")
+                ctx_ids = scene.get("recommended_context_ids") or []
+                logger.info("  - Variation %d (%s): %d context(s) = %s", i + 1, scene.get("mood", ""), len(ctx_ids), ctx_ids)
                 if ctx_ids:
-                    logger.info(f"    Reasoning: {reasoning[:80]}...")
+                    logger.info("    Reasoning: %.80s...", scene.get("context_reasoning") or "(no reasoning)")
 
-        # Convert SceneVariation objects to response model using shared helper
+        # Convert scene dicts to response model using shared helper
         variations = [
-            _scene_to_variation(scene.model_dump())
+            _scene_to_variation(scene)
             for scene in scene_variations[:count]
         ]
 
@@ -785,10 +828,10 @@ async def generate_prompt_variations(req: GeneratePromptsRequest):
             annotation_map = {item[0]: item[3] for item in (context_image_pool or [])}
             for sug in annotation_suggestions:
                 annotation_suggestion_responses.append(AnnotationSuggestionResponse(
-                    image_id=sug.image_id,
-                    original_annotation=annotation_map.get(sug.image_id) or sug.original_annotation,
-                    suggested_annotation=sug.suggested_annotation,
-                    reason=sug.reason,
+                    image_id=sug["image_id"],
+                    original_annotation=annotation_map.get(sug["image_id"]) or sug.get("original_annotation"),
+                    suggested_annotation=sug["suggested_annotation"],
+                    reason=sug["reason"],
                 ))
 
         if not variations:
@@ -840,18 +883,25 @@ async def generate_images_from_prompts(req: GenerateFromPromptsRequest):
     for prompt_data in req.prompts:
         all_context_ids.update(prompt_data.get("recommended_context_ids", []))
 
-    # Load all potentially needed context images
+    # Load all potentially needed context images, reading files concurrently
+    # in worker threads so the event loop isn't blocked on disk I/O
+    found_images = []
+    index = _image_index(metadata)
     for img_id in all_context_ids:
-        if img_id not in context_image_map:
-            img_data, img_path = _find_image_by_id(metadata, img_id)
-            if img_data and img_path:
-                # Support both old "caption" field and new "annotation" field
-                annotation = img_data.get("annotation") or img_data.get("caption", "") or ""
-                context_image_map[img_id] = (
-                    img_path.read_bytes(),
-                    img_data.get("mime_type", "image/png"),
-                    annotation.strip() if annotation else None,
-                )
+        img_data, img_path = _find_image_by_id(metadata, img_id, index)
+        if img_data and img_path:
+            found_images.append((img_id, img_data, img_path))
+    image_bytes_list = await asyncio.gather(
+        *(asyncio.to_thread(img_path.read_bytes) for _, _, img_path in found_images)
+    )
+    for (img_id, img_data, _), img_bytes in zip(found_images, image_bytes_list):
+        # Support both old "caption" field and new "annotation" field
+        annotation = img_data.get("annotation") or img_data.get("caption", "") or ""
+        context_image_map[img_id] = (
+            img_bytes,
+            img_data.get("mime_type", "image/png"),
+            annotation.strip() if annotation else None,
+        )
 
     # Global fallback context images
     global_context_images = None
@@ -879,11 +929,11 @@ async def generate_images_from_prompts(req: GenerateFromPromptsRequest):
                 for img_id in per_var_ids
                 if img_id in context_image_map
             ]
-            logger.info(f"[CONTEXT TRACE] Prompt #{i+1}: using {len(variation_context)} per-variation context: {per_var_ids}")
+            logger.info("[CONTEXT TRACE] Prompt #%d: using %d per-variation context: %s", i + 1, len(variation_context), per_var_ids)
         else:
             # No per-variation context assigned - use no context (not global fallback)
             variation_context = None
-            logger.info(f"[CONTEXT TRACE] Prompt #{i+1}: no per-variation context assigned, using 0 context images")
+            logger.info("[CONTEXT TRACE] Prompt #%d: no per-variation context assigned, using 0 context images", i + 1)
 
         tasks.append(
             _generate_single_image(
@@ -976,8 +1026,10 @@ async def generate_images_from_prompts(req: GenerateFromPromptsRequest):
     )
 
 
+# Read endpoints declare their dict return type so FastAPI hands the metadata
+# to pydantic's JSON serializer instead of walking it with jsonable_encoder
 @app.get("/api/prompts")
-async def list_prompts(session_id: str | None = None):
+async def list_prompts(session_id: str | None = None) -> dict[str, Any]:
     """List all prompts with their images, optionally filtered by session."""
     metadata = load_metadata()
     prompts = metadata.get("prompts", [])
@@ -993,7 +1045,7 @@ async def list_prompts(session_id: str | None = None):
 
 
 @app.get("/api/prompts/{prompt_id}")
-async def get_prompt(prompt_id: str):
+async def get_prompt(prompt_id: str) -> dict[str, Any]:
     """Get a specific prompt with its images."""
     metadata = load_metadata()
     for prompt in metadata.get("prompts", []):
@@ -1216,9 +1268,9 @@ async def upload_images(
         detected_mime_type = _detect_image_mime_type(content)
 
         # Convert HEIC/HEIF to JPEG for browser compatibility
-        # Browsers don't support HEIC natively
+        # Browsers don't support HEIC natively; decode + re-encode in a worker thread
         if detected_mime_type in ("image/heic", "image/heif", "image/avif"):
-            content, detected_mime_type = _convert_heic_to_jpeg(content)
+            content, detected_mime_type = await asyncio.to_thread(_convert_heic_to_jpeg, content)
             ext = ".jpg"
         else:
             ext = Path(file.filename or "image.png").suffix or ".png"
@@ -1227,7 +1279,7 @@ async def upload_images(
         image_id = f"img-{uuid.uuid4().hex[:8]}"
         filename = f"{image_id}{ext}"
         image_path = IMAGES_DIR / filename
-        image_path.write_bytes(content)
+        await asyncio.to_thread(image_path.write_bytes, content)
 
         images.append({
             "id": image_id,
@@ -1298,7 +1350,7 @@ async def import_image_from_url(req: ImportUrlRequest):
         image_id = f"scout-{uuid.uuid4().hex[:8]}"
         filename = f"{image_id}{ext}"
         image_path = IMAGES_DIR / filename
-        image_path.write_bytes(image_bytes)
+        await asyncio.to_thread(image_path.write_bytes, image_bytes)
 
         # Save Metadata (Create a prompt entry for it)
         prompt_entry = {
@@ -1365,79 +1417,82 @@ async def analyze_uploaded_images(req: AnalyzeImagesRequest):
         raise HTTPException(status_code=400, detail="No image IDs provided")
 
     metadata = load_metadata()
-    results = []
     errors = []
 
+    # Resolve images up front, then analyze them concurrently (the Gemini
+    # service bounds in-flight requests)
+    tasks = []
+    index = _image_index(metadata)
     for image_id in req.image_ids:
-        # Find the image in metadata
-        image_data = None
-        prompt_entry = None
-        for prompt in metadata.get("prompts", []):
-            for img in prompt.get("images", []):
-                if img["id"] == image_id:
-                    image_data = img
-                    prompt_entry = prompt
-                    break
-            if image_data:
-                break
-
-        if not image_data:
+        if image_id not in index:
             errors.append({"id": image_id, "error": "Image not found"})
             continue
 
-        # Load the image file
-        image_path = IMAGES_DIR / image_data["image_path"]
-        if not image_path.exists():
+        image_data, image_path = _find_image_by_id(metadata, image_id, index)
+        if not image_data:
             errors.append({"id": image_id, "error": "Image file not found"})
             continue
 
-        try:
-            image_bytes = image_path.read_bytes()
-            mime_type = image_data.get("mime_type", "image/jpeg")
-
-            # Analyze with Gemini
-            analysis = await gemini.analyze_image(image_bytes, mime_type)
-
-            # Convert design dimensions to the stored format
-            design_dimensions = {}
-            for dim in analysis.design_dimensions:
-                design_dimensions[dim.axis] = {
-                    "axis": dim.axis,
-                    "name": dim.name,
-                    "description": dim.description,
-                    "tags": dim.tags,
-                    "generation_prompt": dim.generation_prompt,
-                    "source": "auto",
-                    "confirmed": False,
-                }
+        tasks.append(_analyze_single_image(image_id, image_path, image_data.get("mime_type", "image/jpeg")))
 
-            # Update image metadata atomically
-            async with _metadata_manager.atomic() as fresh_metadata:
-                for prompt in fresh_metadata.get("prompts", []):
-                    for img in prompt.get("images", []):
-                        if img["id"] == image_id:
-                            img["design_dimensions"] = design_dimensions
-                            img["annotation"] = analysis.annotation
-                            break
-
-            results.append({
-                "id": image_id,
-                "design_dimensions": design_dimensions,
-                "annotation": analysis.annotation,
-            })
-            logger.info(f"Analyzed image {image_id}: {len(design_dimensions)} dimensions extracted")
+    outcomes = await asyncio.gather(*tasks)
+    results = [o for o in outcomes if o.get("success")]
+    errors.extend({"id": o["id"], "error": o["error"]} for o in outcomes if not o.get("success"))
 
-        except Exception as e:
-            logger.error(f"Failed to analyze image {image_id}: {e}")
-            errors.append({"id": image_id, "error": str(e)})
+    # Update image metadata atomically - one write for the whole batch
+    if results:
+        analyzed = {r["id"]: r for r in results}
+        async with _metadata_manager.atomic() as fresh_metadata:
+            for prompt in fresh_metadata.get("prompts", []):
+                for img in prompt.get("images", []):
+                    if result := analyzed.get(img["id"]):
+                        img["design_dimensions"] = result["design_dimensions"]
+                        img["annotation"] = result["annotation"]
 
     return {
         "success": len(errors) == 0,
-        "analyzed": results,
+        "analyzed": [
+            {"id": r["id"], "design_dimensions": r["design_dimensions"], "annotation": r["annotation"]}
+            for r in results
+        ],
         "errors": errors,
     }
 
 
+async def _analyze_single_image(image_id: str, image_path: Path, mime_type: str) -> dict:
+    """Analyze one image with Gemini and convert dimensions to the stored format."""
+    try:
+        image_bytes = await asyncio.to_thread(image_path.read_bytes)
+
+        # Analyze with Gemini
+        analysis = await gemini.analyze_image(image_bytes, mime_type)
+
+        # Convert design dimensions to the stored format
+        design_dimensions = {}
+        for dim in analysis.design_dimensions:
+            design_dimensions[dim.axis] = {
+                "axis": dim.axis,
+                "name": dim.name,
+                "description": dim.description,
+                "tags": dim.tags,
+                "generation_prompt": dim.generation_prompt,
+                "source": "auto",
+                "confirmed": False,
+            }
+
+        logger.info(f"Analyzed image {image_id}: {len(design_dimensions)} dimensions extracted")
+        return {
+            "success": True,
+            "id": image_id,
+            "design_dimensions": design_dimensions,
+            "annotation": analysis.annotation,
+        }
+
+    except Exception as e:
+        logger.error(f"Failed to analyze image {image_id}: {e}")
+        return {"success": False, "id": image_id, "error": str(e)}
+
+
 @app.post("/api/enhance-image")
 async def enhance_image(req: EnhanceImageRequest):
     """Generate an enhanced version of an image with professional photoshop-style improvements.
@@ -1468,7 +1523,7 @@ async def enhance_image(req: EnhanceImageRequest):
         raise HTTPException(status_code=404, detail="Image file not found")
 
     try:
-        image_bytes = source_path.read_bytes()
+        image_bytes = await asyncio.to_thread(source_path.read_bytes)
         mime_type = source_image.get("mime_type", "image/jpeg")
 
         # Generate enhanced image
@@ -1486,9 +1541,7 @@ async def enhance_image(req: EnhanceImageRequest):
         ext = ".jpg" if "jpeg" in enhanced_mime else ".png" if "png" in enhanced_mime else ".jpg"
         filename = f"{image_id}{ext}"
 
-        # Decode and save
-        image_data_bytes = base64.b64decode(enhanced_image_data["data"])
-        (IMAGES_DIR / filename).write_bytes(image_data_bytes)
+        await asyncio.to_thread((IMAGES_DIR / filename).write_bytes, enhanced_image_data["data"])
 
         # Create a new prompt entry for the enhanced image
         prompt_id = f"enhanced-{uuid.uuid4().hex[:8]}"
@@ -1565,7 +1618,7 @@ async def toggle_favorite(req: ToggleFavoriteRequest):
 
 
 @app.get("/api/favorites")
-async def get_favorites():
+async def get_favorites() -> dict[str, Any]:
     """Get all favorite images."""
     metadata = load_metadata()
     favorites = metadata.get("favorites", [])
@@ -1587,7 +1640,7 @@ async def get_favorites():
 
 # Legacy endpoint for backwards compatibility
 @app.get("/api/images")
-async def list_images():
+async def list_images() -> dict[str, Any]:
     """List all images (flattened view for backwards compatibility)."""
     metadata = load_metadata()
     all_images = []
@@ -1655,7 +1708,7 @@ def _find_image_data(metadata: dict, image_id: str) -> tuple[dict | None, Path |
 
 
 @app.get("/api/tokens")
-async def list_tokens():
+async def list_tokens() -> dict[str, Any]:
     """List all design tokens."""
     metadata = load_metadata()
     return {"tokens": metadata.get("tokens", [])}
@@ -1723,7 +1776,7 @@ async def create_token(req: CreateTokenRequest):
                 if first_image.get("image_path"):
                     source_path = IMAGES_DIR / first_image["image_path"]
                     if source_path.exists():
-                        source_image_bytes = source_path.read_bytes()
+                        source_image_bytes = await asyncio.to_thread(source_path.read_bytes)
                         # Determine mime type from extension
                         ext = source_path.suffix.lower()
                         if ext == ".png":
@@ -1741,9 +1794,7 @@ async def create_token(req: CreateTokenRequest):
                 # Save concept image
                 concept_filename = f"concept-{uuid.uuid4().hex[:8]}.jpg"
                 concept_path = IMAGES_DIR / concept_filename
-                # Decode base64 string to bytes before writing
-                image_data = base64.b64decode(result.images[0]["data"])
-                concept_path.write_bytes(image_data)
+                await asyncio.to_thread(concept_path.write_bytes, result.images[0]["data"])
                 token["concept_image_path"] = concept_filename
                 token["concept_image_id"] = f"concept-{token_id}"
                 token["concept_prompt_id"] = f"concept-prompt-{token_id}"
@@ -1895,7 +1946,7 @@ async def generate_token_concept(token_id: str, request: GenerateConceptRequest)
         if image_path:
             source_path = IMAGES_DIR / image_path
             if source_path.exists():
-                source_image_bytes = source_path.read_bytes()
+                source_image_bytes = await asyncio.to_thread(source_path.read_bytes)
                 ext = source_path.suffix.lower()
                 if ext == ".png":
                     source_mime_type = "image/png"
@@ -1922,8 +1973,7 @@ async def generate_token_concept(token_id: str, request: GenerateConceptRequest)
     # Save generated image to disk (before acquiring lock)
     concept_filename = f"concept-{uuid.uuid4().hex[:8]}.jpg"
     concept_path = IMAGES_DIR / concept_filename
-    image_data = base64.b64decode(result.images[0]["data"])
-    concept_path.write_bytes(image_data)
+    await asyncio.to_thread(concept_path.write_bytes, result.images[0]["data"])
 
     # Phase 3: Atomically update metadata with async file lock
     # Uses async context manager to avoid blocking event loop while waiting for lock
@@ -2108,14 +2158,16 @@ except ImportError:
 
 
 @app.get("/api/export/taste")
-async def export_taste_profile(include_images: bool = False):
+async def export_taste_profile(include_images: bool = False) -> dict[str, Any]:
     """Export all design tokens as JSON.
 
     Returns the full design token library with optional base64-encoded images.
     """
     metadata = load_metadata()
 
-    export = compile_taste_export(
+    # With images, every token image is read and base64-encoded - keep that off the event loop
+    export = await asyncio.to_thread(
+        compile_taste_export,
         metadata,
         include_images=include_images,
         images_dir=IMAGES_DIR if include_images else None,
@@ -2316,7 +2368,7 @@ async def batch_regenerate(prompt_id: str, count: int = 4):
     if not context_image_ids and target_prompt.get("input_image_id"):
         context_image_ids = [target_prompt["input_image_id"]]
 
-    context_images = _load_context_images(metadata, context_image_ids) if context_image_ids else None
+    context_images = await asyncio.to_thread(_load_context_images, metadata, context_image_ids) if context_image_ids else None
 
     logger.info(f"Regenerating {count} images for prompt {prompt_id}")
 
@@ -2375,18 +2427,19 @@ async def batch_regenerate(prompt_id: str, count: int = 4):
 # ============================================================
 
 @app.get("/api/collections")
-async def list_collections():
+async def list_collections() -> dict[str, Any]:
     """List all image collections."""
     metadata = load_metadata()
     collections = metadata.get("collections", [])
 
     # Enrich with image count and thumbnail
     enriched = []
+    index = _image_index(metadata)
     for coll in collections:
         # Get first image as thumbnail
         thumbnail = None
         for img_id in coll.get("image_ids", [])[:1]:
-            img_data, img_path = _find_image_by_id(metadata, img_id)
+            img_data, img_path = _find_image_by_id(metadata, img_id, index)
             if img_data:
                 thumbnail = img_data.get("image_path")
                 break
@@ -2427,7 +2480,7 @@ async def create_collection(req: CollectionRequest):
 
 
 @app.get("/api/collections/{collection_id}")
-async def get_collection(collection_id: str):
+async def get_collection(collection_id: str) -> dict[str, Any]:
     """Get a collection with full image details."""
     metadata = load_metadata()
 
@@ -2435,19 +2488,17 @@ async def get_collection(collection_id: str):
         if coll["id"] == collection_id:
             # Enrich with full image data
             images = []
+            index = _image_index(metadata)
             for img_id in coll.get("image_ids", []):
-                img_data, img_path = _find_image_by_id(metadata, img_id)
+                img_data, img_path = _find_image_by_id(metadata, img_id, index)
                 if img_data:
-                    # Find parent prompt for context
-                    for prompt in metadata.get("prompts", []):
-                        for img in prompt.get("images", []):
-                            if img["id"] == img_id:
-                                images.append({
-                                    **img_data,
-                                    "prompt_id": prompt["id"],
-                                    "prompt_title": prompt["title"],
-                                })
-                                break
+                    # Parent prompt for context
+                    prompt = _parent_prompt(index, img_data)
+                    images.append({
+                        **img_data,
+                        "prompt_id": prompt["id"],
+                        "prompt_title": prompt["title"],
+                    })
 
             return {
                 **coll,
@@ -2564,14 +2615,14 @@ async def create_story(req: CreateStoryRequest):
 
 
 @app.get("/api/stories")
-async def list_stories():
+async def list_stories() -> dict[str, Any]:
     """List all stories."""
     metadata = load_metadata()
     return {"stories": metadata.get("stories", [])}
 
 
 @app.get("/api/stories/{story_id}")
-async def get_story(story_id: str):
+async def get_story(story_id: str) -> dict[str, Any]:
     """Get a specific story."""
     metadata = load_metadata()
 
@@ -2921,7 +2972,7 @@ async def reset_design_preferences():
 # ============================================================
 
 @app.get("/api/sessions")
-async def list_sessions():
+async def list_sessions() -> dict[str, Any]:
     """List all sessions."""
     metadata = load_metadata()
     sessions = metadata.get("sessions", [])
@@ -2966,7 +3017,7 @@ async def create_session(req: SessionRequest):
 
 
 @app.get("/api/sessions/{session_id}")
-async def get_session(session_id: str):
+async def get_session(session_id: str) -> dict[str, Any]:
     """Get a session with its prompts."""
     metadata = load_metadata()
 
@@ -3248,20 +3299,18 @@ async def trigger_indexing(req: IndexRequest):
 
         if req.image_ids:
             # Index specific images
+            index = _image_index(metadata)
             for img_id in req.image_ids:
-                img_data, img_path = _find_image_by_id(metadata, img_id)
+                img_data, img_path = _find_image_by_id(metadata, img_id, index)
                 if img_data and img_path:
-                    # Find the prompt this image belongs to
-                    for prompt in metadata.get("prompts", []):
-                        for img in prompt.get("images", []):
-                            if img.get("id") == img_id:
-                                images_to_index.append({
-                                    "id": img_id,
-                                    "image_path": img.get("image_path", ""),
-                                    "prompt_id": prompt.get("id", ""),
-                                    "prompt_text": img.get("varied_prompt", ""),
-                                })
-                                break
+                    # The prompt this image belongs to
+                    prompt = _parent_prompt(index, img_data)
+                    images_to_index.append({
+                        "id": img_id,
+                        "image_path": img_data.get("image_path", ""),
+                        "prompt_id": prompt.get("id", ""),
+                        "prompt_text": img_data.get("varied_prompt", ""),
+                    })
         else:
             # Index all missing images
             for prompt in metadata.get("prompts", []):
@@ -7,7 +7,7 @@ from pathlib import Path
 from typing import Any
 
 
-@dataclass
+@dataclass(slots=True)
 class TokenImageExport:
     """An image within a design token for export."""
     id: str
@@ -18,7 +18,7 @@ class TokenImageExport:
     image_base64: str | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class TokenExport:
     """A design token ready for export."""
     id: str
@@ -35,7 +35,7 @@ class TokenExport:
     extraction: dict | None
 
 
-@dataclass
+@dataclass(slots=True)
 class TasteExportV2:
     """Portable design token library export (v2.0)."""
     schema_version: str = "2.0.0"
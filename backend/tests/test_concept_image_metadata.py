@@ -5,7 +5,6 @@ entries with the same metadata structure as regular images.
 """
 
 import json
-import base64
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
 
@@ -27,7 +26,7 @@ class TestCreateTokenWithConceptImage:
 
         # Mock Gemini concept image generation
         mock_result = MagicMock()
-        mock_result.images = [{"data": base64.b64encode(b"fake-image-data").decode()}]
+        mock_result.images = [{"data": b"fake-image-data"}]
 
         with patch("server.gemini") as mock_gemini:
             mock_gemini.generate_concept_image = AsyncMock(return_value=mock_result)
@@ -171,7 +170,7 @@ class TestGenerateTokenConcept:
 
         # Mock Gemini
         mock_result = MagicMock()
-        mock_result.images = [{"data": base64.b64encode(b"fake-concept").decode()}]
+        mock_result.images = [{"data": b"fake-concept"}]
 
         with patch("server.gemini") as mock_gemini:
             mock_gemini.generate_concept_image = AsyncMock(return_value=mock_result)
@@ -261,7 +260,7 @@ class TestGenerateTokenConcept:
 
         # Mock Gemini
         mock_result = MagicMock()
-        mock_result.images = [{"data": base64.b64encode(b"new-concept").decode()}]
+        mock_result.images = [{"data": b"new-concept"}]
 
         with patch("server.gemini") as mock_gemini:
             mock_gemini.generate_concept_image = AsyncMock(return_value=mock_result)
@@ -305,7 +304,7 @@ class TestConceptPromptMetadataStructure:
             json.dump(metadata, f)
 
         mock_result = MagicMock()
-        mock_result.images = [{"data": base64.b64encode(b"test").decode()}]
+        mock_result.images = [{"data": b"test"}]
 
         with patch("server.gemini") as mock_gemini:
             mock_gemini.generate_concept_image = AsyncMock(return_value=mock_result)
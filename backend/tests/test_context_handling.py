@@ -151,3 +151,48 @@ class TestContextImageTracking:
         }
         assert "context_image_ids" in generation_response_prompt
         assert len(generation_response_prompt["context_image_ids"]) == 2
+
+
+class TestImageIndex:
+    """Tests for resolving many image IDs through a prebuilt index."""
+
+    def test_indexed_lookup_matches_scan(self, tmp_path, monkeypatch):
+        """Indexed lookups return the same image, path and parent prompt as a scan."""
+        import server
+
+        monkeypatch.setattr(server, "IMAGES_DIR", tmp_path)
+        (tmp_path / "a.png").write_bytes(b"a")
+        (tmp_path / "b.png").write_bytes(b"b")
+        metadata = {"prompts": [
+            {"id": "p-1", "images": [{"id": "img-a", "image_path": "a.png"}]},
+            {"id": "p-2", "images": [
+                {"id": "img-b", "image_path": "b.png"},
+                {"id": "img-gone", "image_path": "gone.png"},
+            ]},
+        ]}
+
+        index = server._image_index(metadata)
+
+        img_b, _ = server._find_image_by_id(metadata, "img-b", index)
+        assert server._parent_prompt(index, img_b)["id"] == "p-2"
+        for image_id in ("img-a", "img-b", "img-gone", "img-unknown"):
+            assert server._find_image_by_id(metadata, image_id, index) == server._find_image_by_id(metadata, image_id)
+        assert server._find_image_by_id(metadata, "img-gone", index) == (None, None)
+
+    def test_duplicate_id_falls_through_to_existing_file(self, tmp_path, monkeypatch):
+        """A duplicate ID resolves to the first entry whose file exists, as the scan does."""
+        import server
+
+        monkeypatch.setattr(server, "IMAGES_DIR", tmp_path)
+        (tmp_path / "copy.png").write_bytes(b"copy")
+        metadata = {"prompts": [
+            {"id": "p-1", "images": [{"id": "img-dup", "image_path": "missing.png"}]},
+            {"id": "p-2", "images": [{"id": "img-dup", "image_path": "copy.png"}]},
+        ]}
+
+        index = server._image_index(metadata)
+        img_data, img_path = server._find_image_by_id(metadata, "img-dup", index)
+
+        assert (img_data, img_path) == server._find_image_by_id(metadata, "img-dup")
+        assert img_path == tmp_path / "copy.png"
+        assert server._parent_prompt(index, img_data)["id"] == "p-2"
@@ -0,0 +1,456 @@
+"""Tests for GeminiService request-building helpers."""
+
+import asyncio
+import io
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from PIL import Image
+
+from gemini_service import (
+    GeminiService,
+    ImageAnalysisResponse,
+    SceneVariationsResponse,
+    _detect_image_mime_type,
+    _VISION_MAX_EDGE,
+    _analysis_cache,
+    _image_generation_config,
+    _prepare_vision_image,
+    _structured_output_config,
+)
+
+PNG_BYTES = b'\x89PNG\r\n\x1a\n' + b'\x00' * 100
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+class TestClientLifecycle:
+    """Tests for the lazily created Gemini client."""
+
+    @pytest.mark.anyio
+    async def test_aclose_without_client_does_not_create_one(self):
+        """Closing an unused service doesn't construct a client just to close it."""
+        service = GeminiService(api_key="test-key")
+        await service.aclose()
+        assert "client" not in service.__dict__
+
+    @pytest.mark.anyio
+    async def test_aclose_closes_async_client(self):
+        """Closing releases the async client; the next call gets a fresh one."""
+        service = GeminiService(api_key="test-key")
+        client = service.client
+        with patch.object(client.aio, "aclose", AsyncMock()) as mock_aclose:
+            await service.aclose()
+        mock_aclose.assert_awaited_once()
+        assert service.client is not client
+
+    @pytest.mark.anyio
+    async def test_aclose_tolerates_sdk_without_async_close(self):
+        """Older SDK releases without AsyncClient.aclose just drop the client."""
+        service = GeminiService(api_key="test-key")
+        service.__dict__["client"] = MagicMock(aio=MagicMock(spec=[]))
+        await service.aclose()
+        assert "client" not in service.__dict__
+
+
+class TestStructuredOutputConfig:
+    """Tests for the cached structured-output config builder."""
+
+    def test_same_schema_reuses_config(self):
+        """Repeated requests for a schema share one config object."""
+        first = _structured_output_config(ImageAnalysisResponse)
+        assert _structured_output_config(ImageAnalysisResponse) is first
+        assert first.response_mime_type == "application/json"
+        assert first.response_schema is ImageAnalysisResponse
+
+    def test_overrides_build_separate_config(self):
+        """System instruction and temperature are part of the cache key."""
+        base = _structured_output_config(ImageAnalysisResponse)
+        tuned = _structured_output_config(ImageAnalysisResponse, "Be terse.", 0.2)
+        assert tuned is not base
+        assert tuned.system_instruction == "Be terse."
+        assert tuned.temperature == 0.2
+
+    def test_list_bounds_sent_as_max_items(self):
+        """List bounds are part of the JSON schema Gemini receives."""
+        schema = SceneVariationsResponse.model_json_schema()
+        scene = schema["$defs"]["SceneVariation"]["properties"]
+        assert schema["properties"]["scenes"]["maxItems"] == 10
+        assert scene["design_dimensions"]["maxItems"] == 6
+        assert "maxItems" not in scene["recommended_context_ids"]
+
+
+class TestDetectImageMimeType:
+    """Tests for magic-byte MIME detection."""
+
+    @pytest.mark.parametrize("data, expected", [
+        (PNG_BYTES, "image/png"),
+        (b'\xff\xd8\xff\xe0' + b'\x00' * 16, "image/jpeg"),
+        (b'GIF89a' + b'\x00' * 16, "image/gif"),
+        (b'RIFF\x00\x00\x00\x00WEBPVP8 ', "image/webp"),
+        (b'\x00\x00\x00\x18ftypheic\x00\x00', "image/heic"),
+        (b'\x00\x00\x00\x18ftypavif\x00\x00', "image/avif"),
+    ])
+    def test_known_signatures(self, data, expected):
+        """Each supported format is recognized from its signature."""
+        assert _detect_image_mime_type(data) == expected
+
+    @pytest.mark.parametrize("data", [b"", b"\xff", b"RIFF", b"\x00\x00\x00\x18ftypmp42\x00\x00"])
+    def test_unknown_defaults_to_png(self, data):
+        """Truncated or unrecognized data falls back to PNG."""
+        assert _detect_image_mime_type(data) == "image/png"
+
+
+def _png_of_size(width: int, height: int) -> bytes:
+    output = io.BytesIO()
+    Image.new("RGBA", (width, height), (200, 40, 40, 255)).save(output, format="PNG")
+    return output.getvalue()
+
+
+class TestPrepareVisionImage:
+    """Tests for downscaling images sent to text models."""
+
+    def test_large_image_downscaled_to_jpeg(self):
+        """Images over the edge limit are resized and re-encoded as JPEG."""
+        data, mime_type = _prepare_vision_image(_png_of_size(2000, 1000), "image/png")
+        assert mime_type == "image/jpeg"
+        with Image.open(io.BytesIO(data)) as img:
+            assert img.size == (_VISION_MAX_EDGE, _VISION_MAX_EDGE // 2)
+
+    def test_exif_orientation_applied_before_resize(self):
+        """Rotated photos keep their upright orientation after re-encoding."""
+        exif = Image.Exif()
+        exif[0x0112] = 6  # rotate 90 degrees clockwise on display
+        buf = io.BytesIO()
+        Image.new("RGB", (2000, 1000)).save(buf, format="JPEG", exif=exif)
+        data, _ = _prepare_vision_image(buf.getvalue(), "image/jpeg")
+        with Image.open(io.BytesIO(data)) as img:
+            assert img.size == (_VISION_MAX_EDGE // 2, _VISION_MAX_EDGE)
+
+    def test_transparency_flattened_onto_white(self):
+        """Transparent areas come out white rather than black."""
+        buf = io.BytesIO()
+        Image.new("RGBA", (1600, 1600), (0, 0, 0, 0)).save(buf, format="PNG")
+        data, _ = _prepare_vision_image(buf.getvalue(), "image/png")
+        with Image.open(io.BytesIO(data)) as img:
+            assert all(channel > 250 for channel in img.getpixel((10, 10)))
+
+    def test_small_image_passes_through(self):
+        """Images within the limit are sent unchanged."""
+        original = _png_of_size(100, 80)
+        assert _prepare_vision_image(original, "image/png") == (original, "image/png")
+
+    def test_repeat_image_served_from_cache(self):
+        """The same bytes are only decoded and resized once."""
+        original = _png_of_size(1600, 1600)
+        first = _prepare_vision_image(original, "image/png")
+        assert _prepare_vision_image(original, "image/png") is first
+
+    def test_undecodable_data_falls_back_to_original(self):
+        """Data Pillow can't open is passed through rather than failing the request."""
+        assert _prepare_vision_image(b"not an image", "image/png") == (b"not an image", "image/png")
+
+
+class TestBuildVariationContents:
+    """Tests for variation request contents."""
+
+    def test_duplicate_pool_images_uploaded_once(self):
+        """Pool entries with identical bytes share one image part."""
+        service = GeminiService(api_key="test-key")
+        pool = [
+            ("img-a", PNG_BYTES, "image/png", "first", None),
+            ("img-b", PNG_BYTES, "image/png", "second", None),
+        ]
+        contents = service._build_variation_contents("prompt", context_image_pool=pool)
+
+        image_parts = [p for p in contents.parts if p.inline_data]
+        assert len(image_parts) == 1
+        assert "Image ID: img-b (same image as img-a)" in contents.parts[-1].text
+
+    def test_pool_built_as_single_user_content(self):
+        """Prompt, per-image text and images are parts of one user turn."""
+        service = GeminiService(api_key="test-key")
+        pool = [("img-a", PNG_BYTES, "image/png", "first", None)]
+        contents = service._build_variation_contents("prompt", context_image_pool=pool)
+
+        assert contents.role == "user"
+        assert [p.text for p in contents.parts[:2]] == ["prompt", "\n\nImage ID: img-a\nAnnotation: first"]
+        assert contents.parts[2].inline_data.mime_type == "image/png"
+
+    def test_no_images_returns_prompt_string(self):
+        """Without context images the prompt is sent as-is."""
+        service = GeminiService(api_key="test-key")
+        assert service._build_variation_contents("prompt") == "prompt"
+
+
+class TestImageGenerationConfig:
+    """Tests for the cached image generation config builder."""
+
+    def test_same_params_reuse_config(self):
+        """Repeated parameter combinations return the cached config object."""
+        first = _image_generation_config(image_size="1K", aspect_ratio="1:1")
+        second = _image_generation_config(image_size="1K", aspect_ratio="1:1")
+        assert first is second
+
+    def test_different_params_build_new_config(self):
+        """Different parameter combinations get their own config."""
+        square = _image_generation_config(aspect_ratio="1:1")
+        wide = _image_generation_config(aspect_ratio="16:9")
+        assert square is not wide
+        assert wide.image_config.aspect_ratio == "16:9"
+
+    def test_all_params_applied(self):
+        """Every parameter is reflected in the built config."""
+        config = _image_generation_config(
+            image_size="2K",
+            aspect_ratio="3:2",
+            safety_level="BLOCK_ONLY_HIGH",
+            thinking_level="high",
+            temperature=0.7,
+            google_search_grounding=True,
+        )
+        assert config.response_modalities == ["IMAGE"]
+        assert config.image_config.image_size == "2K"
+        assert len(config.safety_settings) == 4
+        assert all(s.threshold == "BLOCK_ONLY_HIGH" for s in config.safety_settings)
+        assert config.thinking_config.thinking_level is not None
+        assert config.temperature == 0.7
+        assert config.tools[0].google_search is not None
+
+    @pytest.mark.anyio
+    async def test_seed_sent_without_touching_cached_config(self):
+        """generate_image sends the seed on a copy; the shared cached config stays seedless."""
+        service = GeminiService(api_key="test-key")
+        response = MagicMock(candidates=[], usage_metadata=None)
+        mock_generate = AsyncMock(return_value=response)
+
+        with patch.object(service.client.aio.models, "generate_content", mock_generate):
+            await service.generate_image("prompt", image_size="1K")
+            await service.generate_image("prompt", image_size="1K", seed=42)
+            await service.generate_image("prompt", image_size="1K")
+
+        cached, seeded, cached_again = (call.kwargs["config"] for call in mock_generate.call_args_list)
+        assert seeded.seed == 42
+        assert seeded is not cached
+        assert cached_again is cached
+        assert cached.seed is None
+
+
+ANALYSIS_PAYLOAD = {
+    "annotation": "A foggy harbor at dawn",
+    "design_dimensions": [{
+        "axis": "lighting",
+        "name": "Diffused Dawn Haze",
+        "description": "Soft light scatters through fog.",
+        "tags": ["soft", "hazy"],
+        "generation_prompt": "Abstract gradients of pale dawn light in fog",
+    }],
+}
+
+
+class TestAnalyzeImage:
+    """Tests for structured image analysis."""
+
+    @pytest.fixture(autouse=True)
+    def clear_analysis_cache(self):
+        _analysis_cache.clear()
+        yield
+        _analysis_cache.clear()
+
+    @pytest.mark.anyio
+    async def test_returns_parsed_analysis(self):
+        """Structured JSON from the model is parsed into ImageAnalysisResponse."""
+        service = GeminiService(api_key="test-key")
+        mock_generate = AsyncMock(return_value=MagicMock(text=json.dumps(ANALYSIS_PAYLOAD)))
+
+        with patch.object(service.client.aio.models, "generate_content", mock_generate):
+            analysis = await service.analyze_image(PNG_BYTES, "image/png")
+
+        assert analysis.annotation == "A foggy harbor at dawn"
+        assert analysis.design_dimensions[0].axis == "lighting"
+        config = mock_generate.call_args.kwargs["config"]
+        assert config.response_mime_type == "application/json"
+        assert config.response_schema is ImageAnalysisResponse
+
+    @pytest.mark.anyio
+    async def test_over_long_lists_trimmed_not_rejected(self):
+        """Lists past the schema's maxItems are cut down instead of failing the analysis."""
+        service = GeminiService(api_key="test-key")
+        dimension = {**ANALYSIS_PAYLOAD["design_dimensions"][0], "tags": [f"tag-{i}" for i in range(8)]}
+        payload = {**ANALYSIS_PAYLOAD, "design_dimensions": [dimension] * 9}
+        mock_generate = AsyncMock(return_value=MagicMock(text=json.dumps(payload)))
+
+        with patch.object(service.client.aio.models, "generate_content", mock_generate):
+            analysis = await service.analyze_image(PNG_BYTES, "image/png")
+
+        assert len(analysis.design_dimensions) == 6
+        assert analysis.design_dimensions[0].tags == [f"tag-{i}" for i in range(5)]
+
+    @pytest.mark.anyio
+    async def test_prompt_part_shared_across_requests(self):
+        """Every request leads with the same prebuilt prompt part, then the image."""
+        service = GeminiService(api_key="test-key")
+        mock_generate = AsyncMock(return_value=MagicMock(text=json.dumps(ANALYSIS_PAYLOAD)))
+
+        with patch.object(service.client.aio.models, "generate_content", mock_generate):
+            await service.analyze_image(PNG_BYTES, "image/png")
+            await service.analyze_image(_png_of_size(10, 10), "image/png")
+
+        first, second = (call.kwargs["contents"] for call in mock_generate.call_args_list)
+        assert first.parts[0] is second.parts[0]
+        assert second.parts[1].inline_data.mime_type == "image/png"
+
+    @pytest.mark.anyio
+    async def test_repeat_image_served_from_cache(self):
+        """Analyzing the same bytes twice makes one API call and returns equal copies."""
+        service = GeminiService(api_key="test-key")
+        mock_generate = AsyncMock(return_value=MagicMock(text=json.dumps(ANALYSIS_PAYLOAD)))
+
+        with patch.object(service.client.aio.models, "generate_content", mock_generate):
+            first = await service.analyze_image(PNG_BYTES, "image/png")
+            first.design_dimensions[0].tags.append("mutated")
+            second = await service.analyze_image(PNG_BYTES, "image/png")
+
+        assert mock_generate.call_count == 1
+        assert second.annotation == first.annotation
+        assert second.design_dimensions[0].tags == ["soft", "hazy"]
+
+
+class TestPromptVariations:
+    """Tests for non-streamed prompt variation generation."""
+
+    @pytest.mark.anyio
+    async def test_over_long_scene_list_trimmed(self):
+        """Scenes past the schema's maxItems are dropped rather than passed through."""
+        service = GeminiService(api_key="test-key")
+        scenes = [{"id": str(i), "title": f"Scene {i}", "description": "d"} for i in range(14)]
+        payload = json.dumps({"title": "Harbor Studies", "scenes": scenes})
+        mock_generate = AsyncMock(return_value=MagicMock(text=payload))
+
+        with patch.object(service.client.aio.models, "generate_content", mock_generate):
+            title, returned, suggestions = await service.generate_prompt_variations("prompt", count=14)
+
+        assert title == "Harbor Studies"
+        assert returned == scenes[:10]
+        assert suggestions is None
+
+    @pytest.mark.anyio
+    async def test_missing_field_named_in_error(self):
+        """A response without scenes fails naming the field, not with a bare KeyError."""
+        service = GeminiService(api_key="test-key")
+        mock_generate = AsyncMock(return_value=MagicMock(text=json.dumps({"title": "Harbor Studies"})))
+
+        with patch.object(service.client.aio.models, "generate_content", mock_generate):
+            with pytest.raises(ValueError, match="scenes"):
+                await service.generate_prompt_variations("prompt", count=1)
+
+
+def _stream_chunk(text):
+    """A streamed response chunk carrying one text part."""
+    part = MagicMock(text=text)
+    return MagicMock(candidates=[MagicMock(content=MagicMock(parts=[part]))])
+
+
+class TestPromptVariationsStream:
+    """Tests for streamed prompt variation generation."""
+
+    @pytest.mark.anyio
+    async def test_complete_event_carries_plain_dicts(self):
+        """Streamed JSON is reassembled and emitted as plain scene dicts."""
+        service = GeminiService(api_key="test-key")
+        payload = json.dumps({
+            "title": "Harbor Studies",
+            "scenes": [{"id": "1", "title": "Fog", "description": "A foggy harbor"}],
+        })
+        midpoint = len(payload) // 2
+
+        async def stream():
+            for text in (payload[:midpoint], payload[midpoint:]):
+                yield _stream_chunk(text)
+
+        mock_stream = AsyncMock(return_value=stream())
+        with patch.object(service.client.aio.models, "generate_content_stream", mock_stream):
+            events = [e async for e in service.generate_prompt_variations_stream("prompt", count=1)]
+
+        assert [e["type"] for e in events] == ["chunk", "chunk", "complete"]
+        complete = events[-1]
+        assert complete["title"] == "Harbor Studies"
+        assert complete["scenes"] == [{"id": "1", "title": "Fog", "description": "A foggy harbor"}]
+        assert complete["annotation_suggestions"] is None
+        assert mock_stream.call_args.kwargs["config"] is _structured_output_config(SceneVariationsResponse)
+
+    @pytest.mark.anyio
+    async def test_slot_released_while_consumer_suspended(self):
+        """A consumer paused between chunks doesn't hold a Gemini request slot."""
+        service = GeminiService(api_key="test-key")
+        service._request_slots = asyncio.Semaphore(1)
+
+        async def stream():
+            yield _stream_chunk('{"title": "T", ')
+            yield _stream_chunk('"scenes": []}')
+
+        mock_stream = AsyncMock(return_value=stream())
+        with patch.object(service.client.aio.models, "generate_content_stream", mock_stream):
+            events = service.generate_prompt_variations_stream("prompt", count=1)
+            first = await events.__anext__()
+            assert first["type"] == "chunk"
+            assert not service._request_slots.locked()
+            rest = [e async for e in events]
+
+        assert [e["type"] for e in rest] == ["chunk", "complete"]
+
+    @pytest.mark.anyio
+    async def test_early_exit_closes_upstream_stream(self):
+        """A consumer that stops early has the upstream response closed before it returns."""
+        service = GeminiService(api_key="test-key")
+        closed = []
+
+        async def stream():
+            try:
+                yield _stream_chunk('{"title": ')
+                await asyncio.Event().wait()
+            finally:
+                closed.append(True)
+
+        mock_stream = AsyncMock(return_value=stream())
+        with patch.object(service.client.aio.models, "generate_content_stream", mock_stream):
+            events = service.generate_prompt_variations_stream("prompt", count=1)
+            assert (await events.__anext__())["type"] == "chunk"
+            await events.aclose()
+
+        assert closed == [True]
+
+    @pytest.mark.anyio
+    async def test_upstream_error_reported_as_event(self):
+        """A failure while reading the stream surfaces as an error event."""
+        service = GeminiService(api_key="test-key")
+
+        async def stream():
+            yield _stream_chunk('{"title": ')
+            raise RuntimeError("connection reset")
+
+        mock_stream = AsyncMock(return_value=stream())
+        with patch.object(service.client.aio.models, "generate_content_stream", mock_stream):
+            events = [e async for e in service.generate_prompt_variations_stream("prompt", count=1)]
+
+        assert [e["type"] for e in events] == ["chunk", "error"]
+        assert events[-1]["error"] == "connection reset"
+
+    @pytest.mark.anyio
+    async def test_malformed_response_reported_by_field(self):
+        """A response missing its title yields an error event that names the field."""
+        service = GeminiService(api_key="test-key")
+
+        async def stream():
+            yield _stream_chunk('{"scenes": []}')
+
+        mock_stream = AsyncMock(return_value=stream())
+        with patch.object(service.client.aio.models, "generate_content_stream", mock_stream):
+            events = [e async for e in service.generate_prompt_variations_stream("prompt", count=1)]
+
+        assert events[-1]["type"] == "error"
+        assert "title" in events[-1]["error"]
@@ -82,6 +82,40 @@ class TestMetadataManagerLoadSave:
             saved_data = json.load(f)
         assert saved_data["prompts"][0]["id"] == "new-1"
 
+    def test_save_round_trips_indented_utf8(self, tmp_path):
+        """Saved file keeps the 2-space layout and round-trips non-ASCII text."""
+        from metadata_manager import MetadataManager
+
+        images_dir = tmp_path / "generated_images"
+        images_dir.mkdir()
+        metadata_path = images_dir / "metadata.json"
+
+        manager = MetadataManager(metadata_path, images_dir)
+        test_data = {
+            "prompts": [{"id": "p-1", "prompt": "Café at dusk", "images": []}],
+            "collections": [{"id": "coll-favorites", "name": "⭐ Favorites"}],
+        }
+        manager.save(test_data)
+
+        assert json.loads(metadata_path.read_bytes()) == test_data
+        raw = metadata_path.read_text(encoding="utf-8")
+        assert raw.startswith('{\n  "prompts": [\n    {\n')
+        assert "Café at dusk" in raw
+        assert manager.load()["prompts"] == test_data["prompts"]
+
+    def test_save_accepts_non_str_keys(self, tmp_path):
+        """Non-str dict keys are stringified, as the stdlib encoder does."""
+        from metadata_manager import MetadataManager
+
+        images_dir = tmp_path / "generated_images"
+        images_dir.mkdir()
+        metadata_path = images_dir / "metadata.json"
+
+        manager = MetadataManager(metadata_path, images_dir)
+        manager.save({"prompts": [], "counts": {1: "one"}})
+
+        assert json.loads(metadata_path.read_bytes())["counts"] == {"1": "one"}
+
     def test_load_migrates_old_images_structure(self, tmp_path):
         """Load migrates old 'images' array to 'prompts' structure."""
         from metadata_manager import MetadataManager
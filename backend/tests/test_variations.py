@@ -125,3 +125,42 @@ class TestVariationGeneration:
         # For now, just verify the endpoint still works
         # Full integration test would require live API calls
         pass  # TODO: Implement E2E test with actual generation
+
+
+class TestSceneToVariation:
+    """Tests for converting model scene dicts into PromptVariations."""
+
+    def test_missing_and_null_keys_use_defaults(self):
+        """Optional keys absent or null in the model's JSON get SceneVariation defaults."""
+        import server
+
+        variation = server._scene_to_variation({
+            "id": "1",
+            "title": "Harbor Dawn",
+            "description": "A foggy harbor at dawn",
+            "mood": None,
+            "design": {"colors": ["muted"], "layout": None},
+        })
+
+        assert variation.text == "A foggy harbor at dawn"
+        assert variation.mood == ""
+        assert variation.type == ""
+        assert variation.design == {"colors": ["muted"], "composition": [], "layout": [], "aesthetic": []}
+        assert variation.design_dimensions == []
+        assert variation.recommended_context_ids == []
+        assert variation.context_reasoning is None
+
+    def test_over_long_lists_trimmed_to_schema_bounds(self):
+        """Design axes and dimensions are cut to SceneVariation's maxItems."""
+        import server
+
+        variation = server._scene_to_variation({
+            "id": "1",
+            "title": "Harbor Dawn",
+            "description": "A foggy harbor at dawn",
+            "design": {"colors": [f"color-{i}" for i in range(9)]},
+            "design_dimensions": [{"axis": f"axis-{i}"} for i in range(9)],
+        })
+
+        assert variation.design["colors"] == [f"color-{i}" for i in range(5)]
+        assert [d["axis"] for d in variation.design_dimensions] == [f"axis-{i}" for i in range(6)]
@@ -21,7 +21,7 @@ def mock_gemini_response():
     return {
         "images": [
             {
-                "data": base64.b64encode(png_bytes).decode(),
+                "data": png_bytes,
                 "mime_type": "image/png",
             }
         ]